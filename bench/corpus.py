@@ -0,0 +1,123 @@
+"""
+Локальная подмена сайтов документации синтетическим корпусом страниц.
+Страницы корпуса повторяют разметку настоящих, но содержат
+сгенерированный текст (см. tests/fixture_data/corpus/README.md).
+
+Файл для URL ищется по пути <хост>/<путь> внутри каталога корпуса,
+для путей, оканчивающихся на «/», берётся index.html.
+"""
+import hashlib
+import io
+import mimetypes
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CORPUS_DIR = BASE_DIR / 'tests' / 'fixture_data' / 'corpus'
+CORPUS_PREFIXES = ('https://peps.python.org/', 'https://docs.python.org/')
+# Скрипты бенчмарков импортируют модули парсера напрямую.
+sys.path.append(str(BASE_DIR / 'src'))
+
+
+def url_to_path(url, corpus_dir=CORPUS_DIR):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if path.endswith('/'):
+        path += 'index.html'
+    return corpus_dir / parts.netloc / path.lstrip('/')
+
+
+class CorpusAdapter(BaseAdapter):
+    """
+    Транспорт requests, отдающий страницы из корпуса.
+    Поддерживает HEAD и Range, считает запросы и переданные байты,
+    может имитировать задержку сети.
+    """
+
+    def __init__(self, corpus_dir=CORPUS_DIR, latency=0.0):
+        super().__init__()
+        self.corpus_dir = corpus_dir
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        path = url_to_path(request.url, self.corpus_dir)
+        if path.is_file():
+            body = path.read_bytes()
+            status, headers = 200, self.headers_for(path, body)
+            status, body = self.apply_range(request, body, headers)
+        else:
+            body = b'Not Found'
+            status, headers = 404, {'Content-Type': 'text/plain'}
+        headers['Content-Length'] = str(len(body))
+        if request.method == 'HEAD':
+            body = b''
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+        return self.build_response(request, status, headers, body)
+
+    @staticmethod
+    def headers_for(path, body):
+        content_type = mimetypes.guess_type(path.name)[0] or 'text/html'
+        if content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        return {
+            'Content-Type': content_type,
+            'Accept-Ranges': 'bytes',
+            'ETag': f'"{hashlib.sha1(body).hexdigest()}"',
+        }
+
+    @staticmethod
+    def apply_range(request, body, headers):
+        match = re.match(
+            r'bytes=(\d+)-(\d*)', request.headers.get('Range', '')
+        )
+        if not match:
+            return 200, body
+        start = int(match.group(1))
+        end = int(match.group(2) or len(body) - 1)
+        headers['Content-Range'] = f'bytes {start}-{end}/{len(body)}'
+        return 206, body[start:end + 1]
+
+    @staticmethod
+    def build_response(request, status, headers, body):
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=status,
+            request_method=request.method,
+            preload_content=False,
+            decode_content=False,
+        )
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if status < 400 else 'Not Found'
+        return response
+
+    def close(self):
+        pass
+
+
+def mount_corpus(session, adapter=None):
+    """Подключает корпус к сессии вместо сети."""
+    adapter = adapter or CorpusAdapter()
+    for prefix in CORPUS_PREFIXES:
+        session.mount(prefix, adapter)
+    return adapter
@@ -0,0 +1,77 @@
+"""
+Память и время разбора индекса PEP из текста и из байтов.
+
+Вариант «текст» повторяет прежний путь: тело ответа декодируется
+в строку (response.text), которая передаётся BeautifulSoup. Вариант
+«байты» передаёт тело lxml без промежуточной строки. Запуск из корня
+проекта:
+    python bench/parse_bytes.py --repeat 20
+
+Страница индекса в корпусе небольшая; для оценки на настоящем индексе
+(несколько мегабайт) можно передать сохранённую страницу:
+    python bench/parse_bytes.py --pep-index pep-index.html
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+from corpus import CORPUS_DIR
+from constants import PEP_INDEX_SCOPE
+from utils import parse_html
+
+
+def parse_text(body):
+    return parse_html(body.decode('utf-8'), scope=PEP_INDEX_SCOPE)
+
+
+def parse_bytes(body):
+    return parse_html(body, scope=PEP_INDEX_SCOPE)
+
+
+def measure(parse, body, repeat):
+    """Среднее время разбора и пик выделенной памяти в байтах."""
+    parse(body)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse(body)
+    seconds = (time.perf_counter() - started) / repeat
+    tracemalloc.start()
+    parse(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument(
+        '--pep-index', type=Path, metavar='PATH',
+        default=CORPUS_DIR / 'peps.python.org' / 'index.html',
+        help='Сохранённая страница индекса PEP',
+    )
+    args = parser.parse_args()
+
+    body = args.pep_index.read_bytes()
+    print(f'Индекс PEP: {len(body) / 1024:.0f} КБ, повторов: {args.repeat}')
+    results = {
+        label: measure(parse, body, args.repeat)
+        for label, parse in (('текст', parse_text), ('байты', parse_bytes))
+    }
+    for label, (seconds, peak) in results.items():
+        print(
+            f'{label:>6}: {seconds * 1000:7.2f} мс, '
+            f'пик памяти {peak / 1024:8.0f} КБ'
+        )
+    (text_seconds, text_peak), (bytes_seconds, bytes_peak) = (
+        results.values()
+    )
+    print(
+        f'ускорение x{text_seconds / bytes_seconds:.2f}, '
+        f'пик памяти меньше на {(text_peak - bytes_peak) / 1024:.0f} КБ'
+    )
+
+
+if __name__ == '__main__':
+    main()
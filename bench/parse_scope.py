@@ -0,0 +1,80 @@
+"""
+Сравнение разбора страниц целиком и в пределах области разбора.
+
+Для каждой страницы выводятся время построения дерева BeautifulSoup,
+пик выделенной памяти и число тегов в дереве. Запуск из корня проекта:
+    python bench/parse_scope.py --repeat 20
+
+Страницы корпуса небольшие; для оценки на настоящем индексе PEP
+(несколько мегабайт) можно передать сохранённую страницу:
+    python bench/parse_scope.py --pep-index pep-index.html
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+from corpus import CORPUS_DIR
+from constants import (
+    DOWNLOADS_SCOPE,
+    PEP_INDEX_SCOPE,
+    VERSIONS_SCOPE,
+    WHATS_NEW_SCOPE,
+)
+from utils import parse_html
+
+# Страница корпуса и область разбора, которую использует режим.
+PAGES = {
+    'pep-index': ('peps.python.org/index.html', PEP_INDEX_SCOPE),
+    'latest-versions': ('docs.python.org/3/index.html', VERSIONS_SCOPE),
+    'download': ('docs.python.org/3/download.html', DOWNLOADS_SCOPE),
+    'whats-new': ('docs.python.org/3/whatsnew/index.html', WHATS_NEW_SCOPE),
+}
+
+
+def measure(html, scope, repeat):
+    """Среднее время разбора, пик памяти в байтах и число тегов."""
+    parse_html(html, scope=scope)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse_html(html, scope=scope)
+    seconds = (time.perf_counter() - started) / repeat
+    tracemalloc.start()
+    soup = parse_html(html, scope=scope)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, len(soup.find_all(True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument(
+        '--pep-index', type=Path, metavar='PATH',
+        help='Сохранённая страница индекса PEP вместо страницы из корпуса',
+    )
+    args = parser.parse_args()
+
+    for name, (page, scope) in PAGES.items():
+        path = CORPUS_DIR / page
+        if name == 'pep-index' and args.pep_index:
+            path = args.pep_index
+        html = path.read_text(encoding='utf-8')
+        full = measure(html, None, args.repeat)
+        scoped = measure(html, scope, args.repeat)
+        print(f'{name} ({len(html) / 1024:.0f} КБ):')
+        for label, (seconds, peak, tags) in (
+            ('целиком', full), ('область', scoped)
+        ):
+            print(
+                f'  {label:>8}: {seconds * 1000:7.2f} мс, '
+                f'пик памяти {peak / 1024:8.0f} КБ, тегов {tags}'
+            )
+        print(
+            f'  ускорение x{full[0] / scoped[0]:.1f}, '
+            f'памяти меньше в {full[1] / scoped[1]:.1f} раза'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Сравнение движков извлечения статуса PEP на страницах корпуса.
+
+Запуск из корня проекта:
+    python bench/parser_engines.py --repeat 20
+"""
+import argparse
+import sys
+import time
+
+from corpus import CORPUS_DIR
+from utils import STATUS_EXTRACTORS
+
+
+def load_pep_pages(corpus_dir=CORPUS_DIR):
+    """Загрузка сохранённых страниц PEP."""
+    return {
+        path.parent.name: path.read_text(encoding='utf-8')
+        for path in sorted(
+            (corpus_dir / 'peps.python.org').glob('pep-*/index.html')
+        )
+    }
+
+
+def extract_all(extractor, pages):
+    return {name: extractor(html, name) for name, html in pages.items()}
+
+
+def measure(extractor, pages, repeat):
+    """Среднее время извлечения статусов со всех страниц."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        extract_all(extractor, pages)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    pages = load_pep_pages()
+    reference = extract_all(STATUS_EXTRACTORS['bs4'], pages)
+    timings = {}
+    for engine, extractor in STATUS_EXTRACTORS.items():
+        if extract_all(extractor, pages) != reference:
+            sys.exit(f'Движок {engine} расходится с bs4')
+        timings[engine] = measure(extractor, pages, args.repeat)
+
+    print(f'Страниц: {len(pages)}, повторов: {args.repeat}')
+    for engine, seconds in timings.items():
+        print(
+            f'{engine:>6}: {seconds * 1000:8.2f} мс на корпус, '
+            f'{seconds / len(pages) * 1000:7.3f} мс на страницу, '
+            f'ускорение x{timings["bs4"] / seconds:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Бенчмарк режимов парсера на синтетическом корпусе страниц.
+
+Каждый вариант запускается в отдельном процессе, страницы отдаются
+из tests/fixture_data/corpus без обращения к сети. Страницы корпуса
+повторяют разметку сайтов, но заполнены сгенерированным текстом,
+а индекс PEP содержит только 10 PEP, поэтому время режимов
+и parse_ms_per_page годятся для сравнения запусков между собой,
+но не для оценки работы на настоящих страницах (см. README.md
+корпуса). Пример:
+
+    python bench/run.py --modes pep whats-new --engines bs4 lxml \
+        --workers 1 8 --latency 20 --json bench.json
+
+Результаты можно сравнить с прошлым запуском через --baseline:
+при замедлении больше --max-regression скрипт завершится с кодом 1.
+"""
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr
+from functools import partial
+from itertools import product
+from pathlib import Path
+
+import requests
+
+from corpus import CORPUS_DIR, CorpusAdapter, mount_corpus
+import main
+from constants import DOWNLOADS_SCOPE, VERSIONS_SCOPE
+from utils import (
+    STATUS_EXTRACTORS,
+    extract_whats_new_from_html,
+    extract_whats_new_sections,
+    parse_html,
+)
+
+CASE_KEYS = ('mode', 'parser_engine', 'workers', 'processes', 'latency_ms')
+
+
+def parse_page(html, url, scope=None):
+    return parse_html(html, scope=scope)
+
+
+# Страницы корпуса, которые разбирает режим, и функция разбора.
+PARSE_TARGETS = {
+    'pep': ('peps.python.org/pep-*/index.html', None),
+    'whats-new': (
+        'docs.python.org/3/whatsnew/3.*.html', extract_whats_new_from_html
+    ),
+    'whats-new-full': (
+        'docs.python.org/3/whatsnew/3.*.html', extract_whats_new_sections
+    ),
+    'latest-versions': (
+        'docs.python.org/3/index.html',
+        partial(parse_page, scope=VERSIONS_SCOPE),
+    ),
+    'download': (
+        'docs.python.org/3/download.html',
+        partial(parse_page, scope=DOWNLOADS_SCOPE),
+    ),
+}
+
+
+# Режимы, которые завершаются сами; serve работает до остановки.
+MODES = tuple(mode for mode in main.MODE_TO_FUNCTION if mode in PARSE_TARGETS)
+
+
+def parse_ms_per_page(mode, parser_engine):
+    """Среднее время разбора одной страницы режима без сети."""
+    pattern, extractor = PARSE_TARGETS[mode]
+    extractor = extractor or STATUS_EXTRACTORS[parser_engine]
+    pages = [
+        (path.read_text(encoding='utf-8'), str(path))
+        for path in sorted(CORPUS_DIR.glob(pattern))
+    ]
+    started = time.perf_counter()
+    for html, url in pages:
+        extractor(html, url)
+    return (time.perf_counter() - started) / len(pages) * 1000
+
+
+def run_mode_once(case):
+    """Один запуск режима на свежей сессии без HTTP-кеша."""
+    session = requests.Session()
+    adapter = mount_corpus(
+        session, CorpusAdapter(latency=case['latency_ms'] / 1000)
+    )
+    options = {
+        option: case[option]
+        for option in main.MODE_OPTIONS.get(case['mode'], ())
+        if option in case
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        main.BASE_DIR = Path(temp_dir)
+        started = time.perf_counter()
+        results = main.MODE_TO_FUNCTION[case['mode']](session, **options)
+        if results is not None:
+            list(results)
+        elapsed = time.perf_counter() - started
+    return elapsed, adapter.requests, adapter.bytes_sent
+
+
+def measure_case(case, repeat, queue):
+    """Замер варианта в дочернем процессе."""
+    logging.disable(logging.CRITICAL)
+    with redirect_stderr(io.StringIO()):
+        runs = [run_mode_once(case) for _ in range(repeat)]
+    wall = statistics.median(run[0] for run in runs)
+    pages, bytes_sent = runs[-1][1], runs[-1][2]
+    queue.put(dict(
+        case,
+        wall_seconds=round(wall, 4),
+        pages=pages,
+        pages_per_second=round(pages / wall, 1) if wall else None,
+        megabytes=round(bytes_sent / 2 ** 20, 3),
+        parse_ms_per_page=round(
+            parse_ms_per_page(case['mode'], case['parser_engine']), 3
+        ),
+        peak_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    ))
+
+
+def run_case(case, repeat):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=measure_case, args=(case, repeat, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def build_cases(args):
+    """Варианты запуска без повторов для режимов без нужных опций."""
+    cases = []
+    for mode, engine, workers, processes in product(
+        args.modes, args.engines, args.workers, args.processes
+    ):
+        options = main.MODE_OPTIONS.get(mode, ())
+        case = {
+            'mode': mode,
+            'parser_engine': engine if 'parser_engine' in options else None,
+            'workers': workers if 'workers' in options else None,
+            'processes': processes if 'processes' in options else None,
+            'latency_ms': args.latency,
+        }
+        if case not in cases:
+            cases.append(case)
+    for case in cases:
+        case['parser_engine'] = case['parser_engine'] or 'bs4'
+    return cases
+
+
+def case_key(case):
+    return tuple(case[key] for key in CASE_KEYS)
+
+
+def compare_with_baseline(results, baseline_path, max_regression):
+    """Сравнение времени с прошлым запуском; True, если есть регрессии."""
+    baseline = {
+        case_key(case): case
+        for case in json.loads(baseline_path.read_text())['cases']
+    }
+    regressed = False
+    for case in results:
+        previous = baseline.get(case_key(case))
+        if previous is None:
+            continue
+        ratio = case['wall_seconds'] / previous['wall_seconds']
+        marker = ''
+        if ratio > 1 + max_regression:
+            marker, regressed = '  <-- регрессия', True
+        print(f'{case_key(case)}: x{ratio:.2f} к базовому{marker}')
+    return regressed
+
+
+def format_option(value):
+    return '-' if value is None else str(value)
+
+
+def print_table(results):
+    header = (
+        f'{"режим":<16}{"движок":<8}{"потоки":>7}{"проц.":>6}'
+        f'{"время, с":>10}{"стр/с":>9}{"разбор, мс":>12}{"RSS, КБ":>10}'
+    )
+    print(header)
+    for case in results:
+        print(
+            f'{case["mode"]:<16}{case["parser_engine"]:<8}'
+            f'{format_option(case["workers"]):>7}'
+            f'{format_option(case["processes"]):>6}'
+            f'{case["wall_seconds"]:>10.3f}'
+            f'{case["pages_per_second"] or 0:>9.1f}'
+            f'{case["parse_ms_per_page"]:>12.3f}'
+            f'{case["peak_rss_kb"]:>10}'
+        )
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--engines', nargs='+', default=['bs4'],
+                        choices=tuple(STATUS_EXTRACTORS))
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 8])
+    parser.add_argument('--processes', nargs='+', type=int, default=[0])
+    parser.add_argument('--latency', type=int, default=0,
+                        help='Имитация задержки сети на запрос, мс')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', type=Path,
+                        help='Файл для машиночитаемых результатов')
+    parser.add_argument('--baseline', type=Path,
+                        help='Результаты прошлого запуска для сравнения')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = [run_case(case, args.repeat) for case in build_cases(args)]
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'cases': results,
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+    if args.baseline and compare_with_baseline(
+        results, args.baseline, args.max_regression
+    ):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_bench()
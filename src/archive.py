@@ -0,0 +1,142 @@
+import io
+import json
+import logging
+import threading
+import zipfile
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+ARCHIVE_INDEX = 'index.json'
+ARCHIVE_VERSION = 1
+# Заголовки, которые теряют смысл для тела, сохранённого целиком.
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+
+def archive_key(method, url):
+    return f'{method} {url}'
+
+
+class ResponseRecorder:
+    """
+    Запись ответов сессии в zip-архив.
+    Тела ответов хранятся сжатыми отдельными файлами, а index.json
+    сопоставляет метод и URL запроса со статусом, заголовками
+    и именем файла тела. Потоковые ответы (загрузка архивов
+    документации) не записываются.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = zipfile.ZipFile(
+            path, 'w', compression=zipfile.ZIP_DEFLATED
+        )
+        self.index = {}
+        self.lock = threading.Lock()
+
+    def attach(self, session):
+        session.hooks['response'].append(self.record)
+        return self
+
+    def record(self, response, *args, stream=False, **kwargs):
+        if stream:
+            return
+        request = response.request
+        key = archive_key(request.method, request.url)
+        body = response.content
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in DROPPED_HEADERS
+        }
+        with self.lock:
+            if key in self.index:
+                return
+            body_name = f'bodies/{len(self.index):06d}'
+            self.archive.writestr(body_name, body)
+            self.index[key] = {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': headers,
+                'body': body_name,
+            }
+
+    def close(self):
+        with self.lock:
+            self.archive.writestr(ARCHIVE_INDEX, json.dumps({
+                'version': ARCHIVE_VERSION,
+                'responses': self.index,
+            }, ensure_ascii=False))
+            self.archive.close()
+        logging.info(
+            f'Записано ответов: {len(self.index)}, архив: {self.path}'
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Транспорт requests, отдающий ответы из архива ResponseRecorder
+    без обращения к сети. Ответ ищется по методу и URL за O(1);
+    запрос, которого нет в архиве, завершается ошибкой соединения.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.archive = zipfile.ZipFile(path)
+        index = json.loads(self.archive.read(ARCHIVE_INDEX))
+        if index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(
+                f'Неподдерживаемая версия архива {path}: '
+                f'{index.get("version")}'
+            )
+        self.index = index['responses']
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        entry = self.index.get(archive_key(request.method, request.url))
+        if entry is None:
+            raise ConnectionError(
+                f'Ответа на {request.method} {request.url} нет в архиве',
+                request=request,
+            )
+        with self.lock:
+            body = self.archive.read(entry['body'])
+        return self.build_response(request, entry, body)
+
+    @staticmethod
+    def build_response(request, entry, body):
+        headers = dict(entry['headers'], **{'Content-Length': str(len(body))})
+        response = Response()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=entry['status'],
+            request_method=request.method,
+            preload_content=False,
+            decode_content=False,
+        )
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        self.archive.close()
+
+
+def mount_replay_adapter(session, path):
+    """Подключает к сессии архив ответов вместо сети."""
+    adapter = ReplayAdapter(path)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
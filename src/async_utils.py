@@ -0,0 +1,65 @@
+import asyncio
+from functools import partial
+from urllib.parse import urlsplit
+
+from constants import DEFAULT_MAX_PER_HOST
+from utils import fetch_and_parse, get_response
+
+
+async def get_response_async(session, url, encoding='utf-8'):
+    """
+    Асинхронная загрузка страницы.
+    Запрос выполняется в пуле потоков и не блокирует цикл событий.
+    """
+    return await asyncio.to_thread(
+        get_response, session, url, encoding=encoding
+    )
+
+
+async def fetch_and_parse_async(session, url, encoding=None,
+                                parser='lxml', scope=None):
+    """
+    Асинхронная загрузка страницы и создание объекта BeautifulSoup.
+    """
+    return await asyncio.to_thread(
+        fetch_and_parse, session, url, encoding=encoding, parser=parser,
+        scope=scope,
+    )
+
+
+async def fetch_many_async(session, urls, max_per_host=DEFAULT_MAX_PER_HOST,
+                           fetch=fetch_and_parse_async):
+    """
+    Параллельная загрузка нескольких страниц.
+    Число одновременных запросов к одному хосту ограничено max_per_host.
+    Результаты возвращаются в порядке urls, ошибки — как исключения.
+    """
+    semaphores = {}
+
+    async def limited_fetch(url):
+        host = urlsplit(url).netloc
+        semaphore = semaphores.setdefault(
+            host, asyncio.Semaphore(max_per_host)
+        )
+        async with semaphore:
+            return await fetch(session, url)
+
+    return await asyncio.gather(
+        *(limited_fetch(url) for url in urls), return_exceptions=True
+    )
+
+
+def _run_mode(mode_function, session, **options):
+    """Запуск режима с полным получением результатов в текущем потоке."""
+    results = mode_function(session, **options)
+    return None if results is None else list(results)
+
+
+async def run_mode_async(mode_function, session, **options):
+    """
+    Запуск режима парсера без блокировки цикла событий.
+    Подходит для любого режима из MODE_TO_FUNCTION.
+    """
+    return await asyncio.to_thread(
+        partial(_run_mode, mode_function, session, **options)
+    )
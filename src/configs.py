@@ -1,13 +1,76 @@
 import argparse
 import logging
+import sys
+from contextlib import nullcontext
+from pathlib import Path
 
-from constants import LOG_DIR, LOG_FILE, AVAILABLE_OUTPUT_CHOICES
+from constants import (
+    AVAILABLE_OUTPUT_CHOICES,
+    CACHE_BACKENDS,
+    CACHE_NAME,
+    DEFAULT_CACHE_BACKEND,
+    DEFAULT_CACHE_EXPIRE,
+    DEFAULT_EXTRACTION_CACHE_SIZE,
+    DEFAULT_MAX_PER_HOST,
+    DEFAULT_PARSER_ENGINE,
+    DEFAULT_PEP_SOURCE,
+    DEFAULT_PROCESSES,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_REFRESH_INTERVAL,
+    DEFAULT_RETRIES,
+    DEFAULT_SERVE_HOST,
+    DEFAULT_SERVE_PORT,
+    DEFAULT_WORKERS,
+    EXTRACTION_CACHE_PATH,
+    LOG_DIR,
+    LOG_FILE,
+    PARSER_ENGINES,
+    PEP_SOURCES,
+    PEP_SNAPSHOT_PATH,
+    PEP_STORE_PATH,
+    PROGRESS_BAR,
+    PROGRESS_MODES,
+    PROGRESS_SILENT,
+    UNCACHED_URLS,
+    URLS_EXPIRE_AFTER,
+)
+
+
+def positive_int(value):
+    """Преобразует аргумент командной строки в положительное число."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f'Ожидается положительное число, получено {value}'
+        )
+    return number
+
+
+def non_negative_int(value):
+    """Преобразует аргумент командной строки в неотрицательное число."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            f'Ожидается неотрицательное число, получено {value}'
+        )
+    return number
+
+
+def non_negative_float(value):
+    """Преобразует аргумент командной строки в неотрицательное число."""
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            f'Ожидается неотрицательное число, получено {value}'
+        )
+    return number
 
 
 def configure_argument_parser(available_modes):
     parser = argparse.ArgumentParser(description='Парсер документации Python')
     parser.add_argument(
         'mode',
+        nargs='+',
         choices=available_modes,
         help='Режимы работы парсера'
     )
@@ -21,6 +84,142 @@ def configure_argument_parser(available_modes):
         choices=AVAILABLE_OUTPUT_CHOICES,
         help='Дополнительные способы вывода данных'
     )
+    parser.add_argument(
+        '-w', '--workers',
+        type=positive_int,
+        default=DEFAULT_WORKERS,
+        help='Количество потоков для загрузки страниц'
+    )
+    parser.add_argument(
+        '--max-per-host',
+        type=positive_int,
+        default=DEFAULT_MAX_PER_HOST,
+        help='Максимум одновременных соединений с одним хостом'
+    )
+    parser.add_argument(
+        '--rate',
+        type=non_negative_float,
+        default=DEFAULT_RATE_LIMIT,
+        metavar='PER_SECOND',
+        help='Максимум запросов к одному хосту в секунду (0 — без ограничения)'
+    )
+    parser.add_argument(
+        '--retries',
+        type=non_negative_int,
+        default=DEFAULT_RETRIES,
+        help='Число повторов запроса после 429, 5xx и обрывов соединения'
+    )
+    parser.add_argument(
+        '-p', '--processes',
+        type=non_negative_int,
+        default=DEFAULT_PROCESSES,
+        help='Количество процессов для разбора HTML (0 — без пула)'
+    )
+    parser.add_argument(
+        '--parser-engine',
+        choices=PARSER_ENGINES,
+        default=DEFAULT_PARSER_ENGINE,
+        help='Движок извлечения статуса со страниц PEP'
+    )
+    parser.add_argument(
+        '--pep-source',
+        choices=PEP_SOURCES,
+        default=DEFAULT_PEP_SOURCE,
+        help='Источник статусов PEP: страницы PEP или api/peps.json'
+    )
+    parser.add_argument(
+        '--incremental',
+        nargs='?',
+        const=PEP_STORE_PATH,
+        default=None,
+        metavar='PATH',
+        help='Инкрементальный режим pep с хранилищем результатов'
+    )
+    parser.add_argument(
+        '--snapshot',
+        type=Path,
+        default=PEP_SNAPSHOT_PATH,
+        metavar='PATH',
+        help='Хранилище статусов PEP прошлого запуска для режима pep-diff'
+    )
+    parser.add_argument(
+        '--cache-backend',
+        choices=CACHE_BACKENDS,
+        default=DEFAULT_CACHE_BACKEND,
+        help='Хранилище HTTP-кеша'
+    )
+    parser.add_argument(
+        '--cache-expire',
+        type=positive_int,
+        default=DEFAULT_CACHE_EXPIRE,
+        metavar='SECONDS',
+        help='Время жизни ответов, не попавших под шаблоны URL'
+    )
+    parser.add_argument(
+        '--cache-max-entries',
+        type=positive_int,
+        metavar='N',
+        help='Максимальное число ответов в кеше'
+    )
+    parser.add_argument(
+        '--stale-while-revalidate',
+        action='store_true',
+        help='Отдавать устаревший ответ из кеша и обновлять его в фоне'
+    )
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument(
+        '--record',
+        type=Path,
+        metavar='ARCHIVE',
+        help='Записать все полученные ответы в zip-архив'
+    )
+    archive.add_argument(
+        '--replay',
+        type=Path,
+        metavar='ARCHIVE',
+        help='Получать ответы из zip-архива без сети и HTTP-кеша'
+    )
+    parser.add_argument(
+        '--extraction-cache-size',
+        type=non_negative_int,
+        default=DEFAULT_EXTRACTION_CACHE_SIZE,
+        metavar='N',
+        help='Максимум сохранённых результатов разбора страниц (0 — без кеша)'
+    )
+    parser.add_argument(
+        '--host',
+        default=DEFAULT_SERVE_HOST,
+        help='Адрес сервера в режиме serve'
+    )
+    parser.add_argument(
+        '--port',
+        type=non_negative_int,
+        default=DEFAULT_SERVE_PORT,
+        help='Порт сервера в режиме serve'
+    )
+    parser.add_argument(
+        '--refresh-interval',
+        type=positive_int,
+        default=DEFAULT_REFRESH_INTERVAL,
+        metavar='SECONDS',
+        help='Период обновления результатов в режиме serve'
+    )
+    parser.add_argument(
+        '--metrics',
+        action='store_true',
+        help='Вывести в лог время фаз и счётчики запросов'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        type=Path,
+        metavar='PATH',
+        help='Сохранить метрики в JSON или, для .prom, в формате Prometheus'
+    )
+    parser.add_argument(
+        '--progress',
+        choices=PROGRESS_MODES,
+        help='Вывод прогресса: индикаторы, события JSON или без вывода'
+    )
     return parser
 
 
@@ -35,3 +234,84 @@ def configure_logging() -> None:
         ]
     )
     logging.info('Логирование настроено.')
+
+
+def configure_session(args):
+    """Создание сессии с HTTP-кешем согласно аргументам командной строки."""
+    if args.replay:
+        return configure_replay_session(args.replay)
+
+    import requests_cache
+
+    from throttling import mount_throttled_adapter
+
+    urls_expire_after = {
+        url: requests_cache.DO_NOT_CACHE for url in UNCACHED_URLS
+    }
+    urls_expire_after.update(URLS_EXPIRE_AFTER)
+    session = requests_cache.CachedSession(
+        str(CACHE_NAME),
+        backend=args.cache_backend,
+        expire_after=args.cache_expire,
+        urls_expire_after=urls_expire_after,
+        stale_while_revalidate=args.stale_while_revalidate,
+    )
+    mount_throttled_adapter(
+        session, args.max_per_host, args.rate, args.retries
+    )
+    if args.clear_cache:
+        session.cache.clear()
+        logging.info('Кеш очищен.')
+    return session
+
+
+def configure_replay_session(path):
+    """Сессия без сети и HTTP-кеша, отдающая ответы из архива."""
+    import requests
+
+    from archive import mount_replay_adapter
+
+    session = requests.Session()
+    mount_replay_adapter(session, path)
+    logging.info(f'Ответы загружаются из архива {path}')
+    return session
+
+
+def configure_recording(session, args):
+    """
+    Запись ответов сессии в архив.
+    Возвращает контекстный менеджер, сохраняющий архив.
+    """
+    if not args.record:
+        return nullcontext()
+    from archive import ResponseRecorder
+
+    return ResponseRecorder(args.record).attach(session)
+
+
+def configure_extraction_cache(args):
+    """
+    Подключение кеша результатов разбора страниц.
+    Возвращает контекстный менеджер, закрывающий кеш.
+    """
+    if not args.extraction_cache_size:
+        return nullcontext()
+    from storage import ExtractionCache
+    from utils import set_extraction_cache
+
+    cache = ExtractionCache(EXTRACTION_CACHE_PATH, args.extraction_cache_size)
+    set_extraction_cache(cache)
+    return cache
+
+
+def configure_progress(args):
+    """
+    Выбор вывода прогресса.
+    По умолчанию индикаторы выводятся только в терминал.
+    """
+    from progress import set_progress
+
+    mode = args.progress
+    if mode is None:
+        mode = PROGRESS_BAR if sys.stderr.isatty() else PROGRESS_SILENT
+    return set_progress(mode)
@@ -1,8 +1,10 @@
+from datetime import timedelta
 from pathlib import Path
 
 
 PEP_INDEX_URL = 'https://peps.python.org/'
 MAIN_DOC_URL = 'https://docs.python.org/3/'
+PEP_API_URL = PEP_INDEX_URL + 'api/peps.json'
 BASE_DIR = Path(__file__).parent
 
 EXPECTED_STATUS = {
@@ -18,8 +20,89 @@ EXPECTED_STATUS = {
 
 LOG_DIR = BASE_DIR / 'logs'
 LOG_FILE = LOG_DIR / 'parser.log'
+METRICS_PREFIX = 'pep_parser'
+PROGRESS_BAR = 'bar'
+PROGRESS_JSON = 'json'
+PROGRESS_SILENT = 'silent'
+PROGRESS_MODES = (PROGRESS_BAR, PROGRESS_JSON, PROGRESS_SILENT)
+# Минимальный интервал между обновлениями прогресса, с.
+PROGRESS_INTERVAL = 0.5
 DOWNLOADS_DIR = 'downloads'
 RESULTS_DIR = 'results'
-AVAILABLE_OUTPUT_CHOICES = ('pretty', 'file')
+EXTRACTION_CACHE_PATH = BASE_DIR / 'extraction_cache.sqlite3'
+DEFAULT_EXTRACTION_CACHE_SIZE = 10000
+PEP_STORE_PATH = BASE_DIR / 'pep_store.sqlite3'
+PEP_SNAPSHOT_PATH = BASE_DIR / 'pep_snapshot.sqlite3'
+AVAILABLE_OUTPUT_CHOICES = (
+    'pretty', 'file', 'jsonl', 'sqlite', 'parquet', 'arrow'
+)
 OUTPUT_PRETTY = 'pretty'
 OUTPUT_FILE = 'file'
+OUTPUT_JSONL = 'jsonl'
+OUTPUT_SQLITE = 'sqlite'
+OUTPUT_PARQUET = 'parquet'
+OUTPUT_ARROW = 'arrow'
+RESULTS_DB = 'results.sqlite3'
+OUTPUT_BATCH_SIZE = 500
+# Имена и типы колонок результатов для машиночитаемых форматов.
+RESULT_COLUMNS = {
+    'whats-new': (('url', str), ('title', str), ('editor', str)),
+    'latest-versions': (('url', str), ('version', str), ('status', str)),
+    'pep': (('status', str), ('count', int)),
+    'pep-diff': (('url', str), ('old_status', str), ('new_status', str)),
+    'whats-new-full': (
+        ('url', str),
+        ('level', int),
+        ('path', str),
+        ('title', str),
+        ('peps', str),
+        ('modules', str),
+    ),
+}
+
+# Режим сервера.
+DEFAULT_SERVE_HOST = '127.0.0.1'
+DEFAULT_SERVE_PORT = 8080
+DEFAULT_REFRESH_INTERVAL = 3600
+
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_PROCESSES = 0
+
+# Ограничение запросов к одному хосту и повторы.
+DEFAULT_RATE_LIMIT = 20.0
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF = 0.5
+MAX_RETRY_DELAY = 60
+RETRY_METHODS = ('GET', 'HEAD')
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+HEALTHY_LATENCY_FACTOR = 2
+MIN_HEALTHY_LATENCY = 0.1
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_RETRIES = 3
+MIN_SEGMENT_SIZE = 1024 * 1024
+PARSER_ENGINES = ('bs4', 'lxml')
+DEFAULT_PARSER_ENGINE = 'bs4'
+# Области разбора страниц: аргументы SoupStrainer для fetch_and_parse.
+WHATS_NEW_SCOPE = {'name': 'section', 'attrs': {'id': 'what-s-new-in-python'}}
+VERSIONS_SCOPE = {'name': 'div', 'attrs': {'class': 'sphinxsidebarwrapper'}}
+DOWNLOADS_SCOPE = {'name': 'div', 'attrs': {'role': 'main'}}
+# Заголовки нужны для названий разделов, к которым относятся таблицы.
+PEP_INDEX_SCOPE = {'name': ['table', 'h2', 'h3']}
+
+PEP_SOURCE_HTML = 'html'
+PEP_SOURCE_API = 'api'
+PEP_SOURCES = (PEP_SOURCE_HTML, PEP_SOURCE_API)
+DEFAULT_PEP_SOURCE = PEP_SOURCE_HTML
+
+CACHE_NAME = BASE_DIR / 'http_cache'
+CACHE_BACKENDS = ('sqlite', 'filesystem', 'memory')
+DEFAULT_CACHE_BACKEND = 'sqlite'
+DEFAULT_CACHE_EXPIRE = 24 * 60 * 60
+# Первый подходящий шаблон определяет время жизни ответа в кеше.
+URLS_EXPIRE_AFTER = {
+    'peps.python.org/pep-': timedelta(days=1),
+    'peps.python.org': timedelta(hours=1),
+    'docs.python.org/3/whatsnew/': timedelta(weeks=1),
+}
+UNCACHED_URLS = ('docs.python.org/3/archives/',)
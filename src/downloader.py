@@ -0,0 +1,218 @@
+import json
+import logging
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from requests import RequestException
+
+from constants import (
+    DEFAULT_WORKERS,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_RETRIES,
+    MIN_SEGMENT_SIZE,
+)
+from exceptions import DownloadError
+from metrics import count
+from progress import receive
+
+# Большие файлы не должны попадать в HTTP-кеш сессии.
+NO_STORE_HEADERS = {'Cache-Control': 'no-store'}
+
+
+class DownloadState:
+    """
+    Состояние загрузки по сегментам, сохраняемое рядом с .part-файлом.
+    Сегмент — список [начало, конец включительно, загружено байт].
+    """
+
+    def __init__(self, path, url, size, segments):
+        self.path = path
+        self.url = url
+        self.size = size
+        self.segments = segments
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path, url, size, workers):
+        segment_size = max(MIN_SEGMENT_SIZE, -(-size // workers))
+        segments = [
+            [start, min(start + segment_size, size) - 1, 0]
+            for start in range(0, size, segment_size)
+        ]
+        return cls(path, url, size, segments)
+
+    @classmethod
+    def load(cls, path, url, size):
+        """Состояние прошлой загрузки того же файла или None."""
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if data.get('url') != url or data.get('size') != size:
+            return None
+        return cls(path, url, size, data['segments'])
+
+    @property
+    def done(self):
+        return sum(segment[2] for segment in self.segments)
+
+    def advance(self, index, length):
+        with self.lock:
+            self.segments[index][2] += length
+            self.save()
+
+    def save(self):
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        temp_path.write_text(json.dumps({
+            'url': self.url,
+            'size': self.size,
+            'segments': self.segments,
+        }), encoding='utf-8')
+        temp_path.replace(self.path)
+
+
+def probe_download(session, url):
+    """Размер файла и поддержка запросов Range по ответу на HEAD."""
+    try:
+        response = session.head(
+            url, headers=NO_STORE_HEADERS, allow_redirects=True
+        )
+        response.raise_for_status()
+    except RequestException as e:
+        logging.warning(f'Не удалось получить сведения о файле {url}: {e}')
+        return 0, False
+    size = int(response.headers.get('Content-Length', 0))
+    accepts_ranges = response.headers.get('Accept-Ranges') == 'bytes'
+    return size, accepts_ranges
+
+
+def _write_segment(session, state, index, part_path, chunk_size, progress):
+    start, end, done = state.segments[index]
+    headers = dict(NO_STORE_HEADERS, Range=f'bytes={start + done}-{end}')
+    with session.get(state.url, headers=headers, stream=True) as response:
+        if response.status_code != HTTPStatus.PARTIAL_CONTENT:
+            raise DownloadError(
+                f'Сервер не вернул диапазон {headers["Range"]}: '
+                f'{response.status_code}'
+            )
+        with open(part_path, 'r+b', buffering=0) as file:
+            file.seek(start + done)
+            for chunk in response.iter_content(chunk_size):
+                file.write(chunk)
+                state.advance(index, len(chunk))
+                progress.update(len(chunk))
+                receive(len(chunk))
+                count('bytes_received', len(chunk))
+
+
+def fetch_segment(session, state, index, part_path, chunk_size, progress):
+    """
+    Загрузка одного сегмента файла запросом Range.
+    При обрыве загрузка сегмента продолжается с последнего
+    записанного байта.
+    """
+    for attempt in range(1, DOWNLOAD_RETRIES + 1):
+        start, end, done = state.segments[index]
+        if start + done > end:
+            return
+        try:
+            _write_segment(
+                session, state, index, part_path, chunk_size, progress
+            )
+        except (RequestException, OSError) as e:
+            count('retries')
+            logging.warning(
+                f'Сегмент {index} ({attempt}/{DOWNLOAD_RETRIES}): {e}'
+            )
+    start, end, done = state.segments[index]
+    if start + done <= end:
+        raise DownloadError(f'Не удалось загрузить сегмент {index}.')
+
+
+def download_segments(session, url, size, part_path, state_path, workers,
+                      chunk_size, progress):
+    """Параллельная загрузка файла сегментами с докачкой."""
+    state = DownloadState.load(state_path, url, size)
+    if state is None or not part_path.exists():
+        state = DownloadState.create(state_path, url, size, workers)
+        with open(part_path, 'wb') as file:
+            file.truncate(size)
+        state.save()
+    else:
+        logging.info(f'Докачка {url}: загружено {state.done} из {size} байт')
+    progress.reset(total=size, done=state.done)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                fetch_segment, session, state, index, part_path,
+                chunk_size, progress,
+            )
+            for index in range(len(state.segments))
+        ]
+        for future in futures:
+            future.result()
+
+
+def download_stream(session, url, part_path, chunk_size, progress):
+    """Загрузка файла одним потоком, если сервер не поддерживает Range."""
+    with session.get(url, headers=NO_STORE_HEADERS, stream=True) as response:
+        response.raise_for_status()
+        with open(part_path, 'wb') as file:
+            for chunk in response.iter_content(chunk_size):
+                file.write(chunk)
+                progress.update(len(chunk))
+                receive(len(chunk))
+                count('bytes_received', len(chunk))
+
+
+def verify_download(path, size):
+    """Проверка размера файла и контрольных сумм zip-архива."""
+    actual_size = path.stat().st_size
+    if size and actual_size != size:
+        raise DownloadError(
+            f'Размер файла не совпадает: {actual_size} вместо {size}.'
+        )
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            broken = archive.testzip()
+        if broken is not None:
+            raise DownloadError(f'Повреждён файл в архиве: {broken}')
+
+
+def download_file(session, url, path, progress, workers=DEFAULT_WORKERS,
+                  chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Загрузка файла с докачкой после обрыва.
+    Если сервер поддерживает Range, файл делится на сегменты,
+    которые загружаются параллельно в предварительно выделенный
+    .part-файл. После проверки .part-файл переименовывается в path.
+    """
+    part_path = path.with_name(path.name + '.part')
+    state_path = path.with_name(path.name + '.part.json')
+    size, accepts_ranges = probe_download(session, url)
+    progress.reset(total=size or None)
+    if size and accepts_ranges:
+        download_segments(
+            session, url, size, part_path, state_path, workers,
+            chunk_size, progress,
+        )
+    else:
+        download_stream(session, url, part_path, chunk_size, progress)
+
+    try:
+        verify_download(part_path, size)
+    except DownloadError:
+        # Сегменты повреждённого файла отмечены загруженными, поэтому
+        # докачка лишь повторила бы ошибку: следующий запуск начнёт
+        # загрузку заново.
+        for leftover in (part_path, state_path):
+            if leftover.exists():
+                leftover.unlink()
+        raise
+    part_path.replace(path)
+    if state_path.exists():
+        state_path.unlink()
+    return path
@@ -4,3 +4,11 @@ class ParserFindTagException(Exception):
 
 class FetchError(Exception):
     """Ошибка при загрузке страницы."""
+
+
+class DownloadError(Exception):
+    """Ошибка при загрузке или проверке файла."""
+
+
+class OutputError(Exception):
+    """Ошибка при сохранении результатов."""
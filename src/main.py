@@ -1,60 +1,162 @@
+import argparse
+import hashlib
 import logging
 import re
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
 from urllib.parse import urljoin
 
-import requests_cache
-from requests.adapters import HTTPAdapter
-from requests.exceptions import ChunkedEncodingError, RequestException
-from tqdm import tqdm
-from urllib3.util.retry import Retry
-
-from configs import configure_argument_parser, configure_logging
-from constants import BASE_DIR, DOWNLOADS_DIR, MAIN_DOC_URL, PEP_INDEX_URL
-from exceptions import ParserFindTagException
+from configs import (
+    configure_argument_parser,
+    configure_extraction_cache,
+    configure_logging,
+    configure_progress,
+    configure_recording,
+    configure_session,
+)
+from constants import (
+    BASE_DIR,
+    DEFAULT_PARSER_ENGINE,
+    DEFAULT_PEP_SOURCE,
+    DEFAULT_PROCESSES,
+    DEFAULT_REFRESH_INTERVAL,
+    DEFAULT_SERVE_HOST,
+    DEFAULT_SERVE_PORT,
+    DEFAULT_WORKERS,
+    DOWNLOADS_DIR,
+    DOWNLOADS_SCOPE,
+    MAIN_DOC_URL,
+    PEP_INDEX_SCOPE,
+    PEP_INDEX_URL,
+    PEP_SNAPSHOT_PATH,
+    PEP_SOURCE_API,
+    VERSIONS_SCOPE,
+    WHATS_NEW_SCOPE,
+)
+from exceptions import DownloadError, FetchError, ParserFindTagException
+from metrics import enable_metrics
 from outputs import control_output
+from progress import progress_task, track, UNIT_BYTES
+from records import (
+    MismatchRecord,
+    pep_status,
+    PepRecord,
+    StatusChange,
+    StatusCount,
+    VersionRecord,
+    WhatsNewRecord,
+    WhatsNewSectionRecord,
+)
+from storage import PepStore
 from utils import (
+    extract_concurrently,
+    extract_pep_index,
+    extract_status_from_pep_page,
+    extract_whats_new_from_html,
+    extract_whats_new_sections,
     fetch_and_parse,
+    fetch_pep_api_statuses,
     find_tag,
-    extract_rows_from_tables,
-    extract_status_from_pep_page,
-    parse_row,
+    flush_extraction_cache,
+    get_conditional_response,
+    map_concurrently,
+    STATUS_EXTRACTORS,
+    trim_cache,
 )
 
 
-def whats_new(session):
-    """Парсинг раздела What's New."""
+def get_version_links(sections, whats_new_url, errors):
+    """Сбор ссылок на статьи What's New из оглавления."""
+    version_links = []
+    for section in sections:
+        try:
+            version_a_tag = find_tag(section, 'a')
+        except ParserFindTagException as e:
+            errors.append(f'Ошибка при обработке раздела: {e}')
+            continue
+        version_links.append(urljoin(whats_new_url, version_a_tag['href']))
+    return version_links
+
+
+def collect_version_links(session, errors):
+    """Ссылки на статьи What's New из оглавления раздела."""
     whats_new_url = urljoin(MAIN_DOC_URL, 'whatsnew/')
-    soup = fetch_and_parse(session, whats_new_url)
+    soup = fetch_and_parse(session, whats_new_url, scope=WHATS_NEW_SCOPE)
 
     main_div = find_tag(soup, 'section', attrs={'id': 'what-s-new-in-python'})
     div_with_ul = find_tag(main_div, 'div', attrs={'class': 'toctree-wrapper'})
     sections_by_python = div_with_ul.find_all('li',
                                               attrs={'class': 'toctree-l1'})
+    return get_version_links(sections_by_python, whats_new_url, errors)
+
 
-    results = [('Ссылка на статью', 'Заголовок', 'Редактор, автор')]
+def whats_new(session, workers=DEFAULT_WORKERS, processes=DEFAULT_PROCESSES):
+    """
+    Парсинг раздела What's New.
+    Строки результата отдаются по мере разбора статей.
+    """
     errors = []
+    version_links = collect_version_links(session, errors)
+
+    yield ('Ссылка на статью', 'Заголовок', 'Редактор, автор')
 
-    for section in tqdm(sections_by_python, desc='Парсинг нововведений'):
+    futures = extract_concurrently(
+        session, version_links, extract_whats_new_from_html,
+        workers, processes,
+    )
+    for version_link, future in track(zip(version_links, futures),
+                                      'Парсинг нововведений',
+                                      total=len(version_links)):
         try:
-            version_a_tag = find_tag(section, 'a')
-            href = version_a_tag['href']
-            version_link = urljoin(whats_new_url, href)
-            soup = fetch_and_parse(session, version_link)
-            h1 = find_tag(soup, 'h1')
-            dl = find_tag(soup, 'dl')
-            results.append((version_link, h1.text.strip(), dl.text.strip()))
+            h1_text, dl_text = future.result()
         except Exception as e:
             errors.append(f'Ошибка при обработке ссылки {version_link}: {e}')
+            continue
+        yield WhatsNewRecord(version_link, h1_text, dl_text)
 
     for error in errors:
         logging.warning(error)
 
-    return results
+
+def whats_new_full(session, workers=DEFAULT_WORKERS,
+                   processes=DEFAULT_PROCESSES):
+    """
+    Парсинг разделов всех статей What's New.
+    Для каждого раздела отдаётся строка с путём в дереве разделов,
+    упомянутыми PEP и модулями.
+    """
+    errors = []
+    version_links = collect_version_links(session, errors)
+
+    yield ('Ссылка на раздел', 'Уровень', 'Путь', 'Заголовок', 'PEP',
+           'Модули')
+
+    futures = extract_concurrently(
+        session, version_links, extract_whats_new_sections,
+        workers, processes,
+    )
+    for version_link, future in track(zip(version_links, futures),
+                                      'Парсинг разделов',
+                                      total=len(version_links)):
+        try:
+            sections = future.result()
+        except Exception as e:
+            errors.append(f'Ошибка при обработке ссылки {version_link}: {e}')
+            continue
+        yield from map(WhatsNewSectionRecord._make, sections)
+
+    for error in errors:
+        logging.warning(error)
 
 
 def latest_versions(session):
-    """Парсинг версий Python и их статусов с главной страницы документации."""
-    soup = fetch_and_parse(session, MAIN_DOC_URL)
+    """
+    Парсинг версий Python и их статусов с главной страницы документации.
+    Строки результата отдаются по одной.
+    """
+    soup = fetch_and_parse(session, MAIN_DOC_URL, scope=VERSIONS_SCOPE)
 
     sidebar = find_tag(soup, 'div', attrs={'class': 'sphinxsidebarwrapper'})
     ul_tags = sidebar.find_all('ul')
@@ -66,7 +168,7 @@ def latest_versions(session):
     else:
         raise ParserFindTagException('Не найден список версий.')
 
-    results = [('Ссылка на документацию', 'Версия', 'Статус')]
+    yield ('Ссылка на документацию', 'Версия', 'Статус')
 
     for a_tag in a_tags:
         link = a_tag['href']
@@ -80,15 +182,17 @@ def latest_versions(session):
         else:
             version = text
             status = ''
-        results.append((link, version, status))
+        yield VersionRecord(link, version, status)
 
-    return results
 
-
-def download(session):
+def download(session, workers=DEFAULT_WORKERS):
     """Загрузка PDF документации."""
+    from requests.exceptions import RequestException
+
+    from downloader import download_file
+
     downloads_url = urljoin(MAIN_DOC_URL, 'download.html')
-    soup = fetch_and_parse(session, downloads_url)
+    soup = fetch_and_parse(session, downloads_url, scope=DOWNLOADS_SCOPE)
 
     main_tag = find_tag(soup, 'div', attrs={'role': 'main'})
     table_tag = find_tag(main_tag, 'table', attrs={'class': 'docutils'})
@@ -102,101 +206,401 @@ def download(session):
     downloads_dir.mkdir(exist_ok=True)
     archive_path = downloads_dir / filename
 
-    retries = Retry(
-        total=5,
-        backoff_factor=1,
-        status_forcelist=[500, 502, 503, 504],
-    )
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
-
-    try:
-        response = session.get(archive_url, stream=True)
-        response.raise_for_status()
-
-        total_size_in_bytes = int(response.headers.get('content-length', 0))
-        block_size = 1024
-        progress_bar = tqdm(total=total_size_in_bytes,
-                            unit='iB',
-                            unit_scale=True)
-
-        with open(archive_path, 'wb') as file:
-            for data in response.iter_content(block_size):
-                progress_bar.update(len(data))
-                file.write(data)
-
-        progress_bar.close()
-        if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
-            logging.error('Ошибка при загрузке: размер файла не совпадает.')
-        else:
-            logging.info(f'Архив успешно загружен и сохранён: {archive_path}')
-    except (ChunkedEncodingError, RequestException) as e:
-        logging.error(f'Ошибка при загрузке файла: {e}')
+    with progress_task('Загрузка архива', unit=UNIT_BYTES) as task:
+        try:
+            download_file(session, archive_url, archive_path, task, workers)
+            logging.info(
+                f'Архив успешно загружен и сохранён: {archive_path}'
+            )
+        except (DownloadError, RequestException) as e:
+            logging.error(f'Ошибка при загрузке файла: {e}')
 
 
-def pep(session):
-    """Парсинг всех таблиц PEP и подсчет статусов."""
-    soup = fetch_and_parse(session, PEP_INDEX_URL)
-    rows = extract_rows_from_tables(soup)
+def table_status_unchanged(stored, entry):
+    """Статус PEP в таблице индекса совпадает с сохранённым."""
+    return (
+        stored is not None
+        and stored['table_status'] == ', '.join(entry.table_status)
+    )
 
-    results = {}
-    total_peps = 0
-    warnings = []
 
-    for row in tqdm(rows, desc='Обработка строк таблиц'):
+def refresh_pep_status(session, store, extractor, entry):
+    """
+    Получение статуса PEP с учётом результатов прошлого запуска.
+    Страница перезапрашивается условным запросом и разбирается заново,
+    только если изменились статус в таблице или содержимое страницы.
+    Страницы новых PEP и PEP с изменённым статусом в таблице
+    загружаются в обход HTTP-кеша: индекс хранится в кеше меньше
+    страниц PEP, и устаревшая страница сохранилась бы в хранилище
+    вместе с новым статусом из таблицы.
+    """
+    pep_link = entry.link
+    table_status = ', '.join(entry.table_status)
+    stored = store.get(pep_link)
+    if not table_status_unchanged(stored, entry):
+        stored = None
+        response = get_conditional_response(session, pep_link)
+    else:
+        response = get_conditional_response(
+            session, pep_link, stored['etag'], stored['last_modified']
+        )
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            return stored['page_status']
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if stored is not None and stored['content_hash'] == content_hash:
+        page_status = stored['page_status']
+    else:
+        page_status = extractor(response.content, pep_link)
+    store.save({
+        'url': pep_link,
+        'table_status': table_status,
+        'page_status': page_status,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_hash': content_hash,
+    })
+    return page_status
+
+
+def api_status_futures(session, entries, parser_engine, workers):
+    """
+    Futures статусов PEP в порядке entries по данным api/peps.json.
+    Статус из API используется, если он согласуется с таблицей индекса;
+    отсутствующие в API и расходящиеся PEP загружаются со своих страниц.
+    """
+    try:
+        api_statuses = fetch_pep_api_statuses(session)
+    except FetchError as e:
+        logging.warning(f'{e}. Статусы будут получены со страниц PEP.')
+        api_statuses = {}
+    fallback = {
+        entry.number: entry.link for entry in entries
+        if api_statuses.get(entry.number) not in entry.table_status
+    }
+    logging.info(
+        f'Статусов из API: {len(entries) - len(fallback)}, '
+        f'со страниц PEP: {len(fallback)}'
+    )
+    scraped = map_concurrently(
+        partial(
+            extract_status_from_pep_page, session,
+            parser_engine=parser_engine,
+        ),
+        fallback.values(),
+        workers,
+    )
+    for entry in entries:
+        if entry.number in fallback:
+            yield next(scraped)
+            continue
+        future = Future()
+        future.set_result(api_statuses[entry.number])
+        yield future
+    scraped.close()
+
+
+def collect_pep_records(entries, futures, warnings):
+    """Записи PepRecord по результатам futures в порядке entries."""
+    for entry, future in track(
+        zip(entries, futures),
+        'Обработка строк таблиц',
+        total=len(entries),
+    ):
         try:
-            table_status, pep_link = parse_row(row, table_index=0)
-            page_status = extract_status_from_pep_page(session, pep_link)
-
-            if page_status not in table_status:
-                warnings.append(
-                    f'Несовпадающие статусы:\n{pep_link}\n'
-                    f'Статус в карточке: {page_status}\n'
-                    f'Ожидаемые статусы: {table_status}'
-                )
-
-            results[page_status] = results.get(page_status, 0) + 1
-            total_peps += 1
+            page_status = pep_status(future.result())
         except Exception as e:
             warnings.append(f'Ошибка при обработке строки: {e}')
+            continue
+        yield PepRecord(
+            entry.number, entry.link, entry.table_status, page_status
+        )
+
+
+def count_pep_statuses(records, warnings):
+    """
+    Подсчёт статусов PEP и сбор расхождений с таблицей.
+    Возвращает строки StatusCount с итоговой строкой Total.
+    """
+    counts = Counter()
+    for record in records:
+        if not record.matches_table:
+            warnings.append(MismatchRecord(
+                record.link, record.status, record.table_status
+            ))
+        counts[record.status] += 1
+    return [
+        StatusCount(status, count) for status, count in counts.items()
+    ] + [StatusCount('Total', sum(counts.values()))]
+
+
+def pep(session, workers=DEFAULT_WORKERS, processes=DEFAULT_PROCESSES,
+        parser_engine=DEFAULT_PARSER_ENGINE, incremental=None,
+        pep_source=DEFAULT_PEP_SOURCE):
+    """
+    Парсинг всех таблиц PEP и подсчет статусов.
+    В инкрементальном режиме incremental — путь к хранилищу
+    результатов прошлых запусков. При pep_source='api' статусы
+    берутся из api/peps.json, а страницы PEP загружаются только
+    для расхождений.
+    """
+    soup = fetch_and_parse(session, PEP_INDEX_URL, scope=PEP_INDEX_SCOPE)
+    warnings = []
+    entries = extract_pep_index(soup, warnings)
+    extractor = STATUS_EXTRACTORS[parser_engine]
+
+    if incremental:
+        with PepStore(incremental) as store:
+            store.prune(entry.link for entry in entries)
+            futures = map_concurrently(
+                partial(refresh_pep_status, session, store, extractor),
+                entries,
+                workers,
+            )
+            results = count_pep_statuses(
+                collect_pep_records(entries, futures, warnings), warnings
+            )
+    else:
+        if pep_source == PEP_SOURCE_API:
+            futures = api_status_futures(
+                session, entries, parser_engine, workers
+            )
+        else:
+            futures = extract_concurrently(
+                session, [entry.link for entry in entries],
+                extractor, workers, processes,
+            )
+        results = count_pep_statuses(
+            collect_pep_records(entries, futures, warnings), warnings
+        )
 
-    results['Total'] = total_peps
-    logging.info(f'Результаты парсинга PEP: {results}')
+    logging.info(
+        'Результаты парсинга PEP: '
+        + ', '.join(f'{status}: {count}' for status, count in results)
+    )
 
     for warning in warnings:
         logging.warning(warning)
 
-    return [('Статус', 'Количество')] + list(results.items())
+    return [('Статус', 'Количество')] + results
+
+
+def status_changes(records, previous, removed):
+    """
+    Переходы статусов PEP относительно прошлого запуска:
+    изменившиеся и новые PEP, затем удалённые из индекса.
+    """
+    changes = [
+        StatusChange(record.link, previous.get(record.link, ''), record.status)
+        for record in records
+        if previous.get(record.link) != record.status
+    ]
+    changes.extend(
+        StatusChange(link, previous[link], '') for link in sorted(removed)
+    )
+    return changes
+
+
+def pep_diff(session, workers=DEFAULT_WORKERS,
+             parser_engine=DEFAULT_PARSER_ENGINE,
+             snapshot=PEP_SNAPSHOT_PATH):
+    """
+    Изменения статусов PEP с прошлого запуска.
+    Статусы прошлого запуска берутся из хранилища snapshot.
+    Страницы загружаются только для новых PEP и PEP, чей статус
+    в таблице индекса изменился; остальные PEP считаются
+    неизменёнными. Отдаются только переходы статусов.
+    """
+    soup = fetch_and_parse(session, PEP_INDEX_URL, scope=PEP_INDEX_SCOPE)
+    warnings = []
+    entries = extract_pep_index(soup, warnings)
+    extractor = STATUS_EXTRACTORS[parser_engine]
+
+    with PepStore(snapshot) as store:
+        previous = {
+            url: record['page_status']
+            for url, record in store.records.items()
+        }
+        changed = [
+            entry for entry in entries
+            if not table_status_unchanged(store.get(entry.link), entry)
+        ]
+        logging.info(
+            f'PEP с изменённым статусом в индексе: {len(changed)} '
+            f'из {len(entries)}'
+        )
+        futures = map_concurrently(
+            partial(refresh_pep_status, session, store, extractor),
+            changed,
+            workers,
+        )
+        records = list(collect_pep_records(changed, futures, warnings))
+        removed = store.prune(entry.link for entry in entries)
+
+    warnings.extend(
+        MismatchRecord(record.link, record.status, record.table_status)
+        for record in records if not record.matches_table
+    )
+    for warning in warnings:
+        logging.warning(warning)
+
+    return [('Ссылка на PEP', 'Было', 'Стало')] + status_changes(
+        records, previous, removed
+    )
+
+
+def maintain_caches(session, cache_max_entries=None):
+    """
+    Сохранение кеша извлечённых данных и ограничение числа ответов
+    в HTTP-кеше. Сервер не завершается, поэтому вызывается после
+    каждого обновления результатов.
+    """
+    flush_extraction_cache()
+    # У сессии воспроизведения архива нет HTTP-кеша.
+    if cache_max_entries and hasattr(session, 'cache'):
+        trim_cache(session.cache, cache_max_entries)
+
+
+def serve(session, host=DEFAULT_SERVE_HOST, port=DEFAULT_SERVE_PORT,
+          refresh_interval=DEFAULT_REFRESH_INTERVAL, workers=DEFAULT_WORKERS,
+          processes=DEFAULT_PROCESSES, parser_engine=DEFAULT_PARSER_ENGINE,
+          pep_source=DEFAULT_PEP_SOURCE, cache_max_entries=None):
+    """
+    Режим сервера: результаты режимов pep, latest-versions и whats-new
+    хранятся в памяти, обновляются в фоне раз в refresh_interval секунд
+    и отдаются в JSON по запросам GET /pep, /latest-versions, /whats-new.
+    После каждого обновления кеши сохраняются и ограничиваются.
+    """
+    from server import ResultCache, serve_results
+
+    results = ResultCache({
+        'pep': partial(
+            pep, session, workers=workers, processes=processes,
+            parser_engine=parser_engine, pep_source=pep_source,
+        ),
+        'latest-versions': partial(latest_versions, session),
+        'whats-new': partial(
+            whats_new, session, workers=workers, processes=processes
+        ),
+    }, after_refresh=partial(maintain_caches, session, cache_max_entries))
+    serve_results(results, host, port, refresh_interval)
 
 
 MODE_TO_FUNCTION = {
     'whats-new': whats_new,
+    'whats-new-full': whats_new_full,
     'latest-versions': latest_versions,
     'download': download,
     'pep': pep,
+    'pep-diff': pep_diff,
+    'serve': serve,
+}
+
+MODE_OPTIONS = {
+    'whats-new': ('workers', 'processes'),
+    'whats-new-full': ('workers', 'processes'),
+    'download': ('workers',),
+    'pep': (
+        'workers', 'processes', 'parser_engine', 'incremental', 'pep_source'
+    ),
+    'pep-diff': ('workers', 'parser_engine', 'snapshot'),
+    'serve': (
+        'host', 'port', 'refresh_interval', 'workers', 'processes',
+        'parser_engine', 'pep_source', 'cache_max_entries',
+    ),
 }
 
 
+# Режимы, которые нельзя запускать вместе с другими.
+STANDALONE_MODES = ('serve',)
+
+
+def run_mode(session, args, mode):
+    options = {
+        option: getattr(args, option)
+        for option in MODE_OPTIONS.get(mode, ())
+    }
+    return MODE_TO_FUNCTION[mode](session, **options)
+
+
+def collect_results(session, args, mode):
+    """Запуск режима с получением всех строк результата."""
+    results = run_mode(session, args, mode)
+    return None if results is None else list(results)
+
+
+def run_batch(session, args):
+    """
+    Одновременный запуск нескольких режимов на общей сессии.
+    Одинаковые одновременные запросы режимов объединяются, а результаты
+    каждого режима выводятся отдельно в порядке перечисления режимов.
+    """
+    with ThreadPoolExecutor(max_workers=len(args.mode)) as executor:
+        futures = [
+            executor.submit(collect_results, session, args, mode)
+            for mode in args.mode
+        ]
+        for mode, future in zip(args.mode, futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                logging.exception(f'Ошибка в режиме {mode}: {e}')
+                continue
+            if results is not None:
+                control_output(
+                    results, argparse.Namespace(**dict(vars(args), mode=mode))
+                )
+
+
+def run_modes(session, args):
+    """Запуск выбранных режимов и вывод их результатов."""
+    if len(args.mode) > 1:
+        run_batch(session, args)
+        return
+    mode_args = argparse.Namespace(**dict(vars(args), mode=args.mode[0]))
+    results = run_mode(session, mode_args, mode_args.mode)
+    if results is not None:
+        control_output(results, mode_args)
+
+
+def parse_arguments():
+    arg_parser = configure_argument_parser(MODE_TO_FUNCTION.keys())
+    args = arg_parser.parse_args()
+    args.mode = list(dict.fromkeys(args.mode))
+    standalone = set(args.mode).intersection(STANDALONE_MODES)
+    if len(args.mode) > 1 and standalone:
+        arg_parser.error(
+            f'Режим {", ".join(standalone)} нельзя запускать '
+            'вместе с другими режимами'
+        )
+    return args
+
+
 def main():
     """Главная функция запуска парсера."""
     try:
         configure_logging()
         logging.info('Парсер запущен!')
 
-        arg_parser = configure_argument_parser(MODE_TO_FUNCTION.keys())
-        args = arg_parser.parse_args()
+        args = parse_arguments()
 
         logging.info(f'Аргументы командной строки: {args}')
 
-        session = requests_cache.CachedSession()
-        if args.clear_cache:
-            session.cache.clear()
-            logging.info('Кеш очищен.')
-
-        parser_mode = args.mode
-        results = MODE_TO_FUNCTION[parser_mode](session)
-        if results is not None:
-            control_output(results, args)
+        session = configure_session(args)
+        configure_progress(args)
+        metrics = None
+        if args.metrics or args.metrics_file:
+            metrics = enable_metrics()
+
+        with configure_extraction_cache(args), \
+                configure_recording(session, args):
+            run_modes(session, args)
+        if args.cache_max_entries and not args.replay:
+            trim_cache(session.cache, args.cache_max_entries)
+        if metrics is not None:
+            metrics.log_summary()
+            if args.metrics_file:
+                metrics.export(args.metrics_file)
 
         logging.info('Парсер завершил работу.')
     except Exception as e:
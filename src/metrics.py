@@ -0,0 +1,186 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from constants import METRICS_PREFIX
+
+# Активный сборщик метрик; None — инструментирование выключено.
+_metrics = None
+_DISABLED = nullcontext()
+
+
+class Metrics:
+    """
+    Сборщик времени фаз и счётчиков событий за один запуск парсера.
+    Для каждой фазы хранится число замеров, суммарное и максимальное
+    время в секундах.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.counters = {}
+
+    def observe(self, phase, seconds):
+        with self.lock:
+            count, total, longest = self.phases.get(phase, (0, 0.0, 0.0))
+            self.phases[phase] = (
+                count + 1, total + seconds, max(longest, seconds)
+            )
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started)
+
+    def summary(self):
+        """Сводка метрик в виде словаря."""
+        with self.lock:
+            return {
+                'phases': {
+                    phase: {
+                        'count': count,
+                        'total_seconds': round(total, 6),
+                        'max_seconds': round(longest, 6),
+                    }
+                    for phase, (count, total, longest)
+                    in sorted(self.phases.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def to_json(self):
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Сводка метрик в текстовом формате Prometheus."""
+        summary = self.summary()
+        phase_metric = f'{METRICS_PREFIX}_phase_seconds'
+        lines = [
+            f'# HELP {phase_metric} Время фаз парсера в секундах.',
+            f'# TYPE {phase_metric} summary',
+        ]
+        for phase, values in summary['phases'].items():
+            lines.append(
+                f'{phase_metric}_count{{phase="{phase}"}} {values["count"]}'
+            )
+            lines.append(
+                f'{phase_metric}_sum{{phase="{phase}"}} '
+                f'{values["total_seconds"]}'
+            )
+        for name, value in summary['counters'].items():
+            metric = f'{METRICS_PREFIX}_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """
+        Сохранение сводки в файл.
+        Для расширения .prom используется формат Prometheus,
+        для остальных — JSON.
+        """
+        if path.suffix == '.prom':
+            text = self.to_prometheus()
+        else:
+            text = self.to_json()
+        path.write_text(text, encoding='utf-8')
+        logging.info(f'Метрики сохранены в {path}')
+
+    def log_summary(self):
+        summary = self.summary()
+        for phase, values in summary['phases'].items():
+            average = values['total_seconds'] / values['count'] * 1000
+            logging.info(
+                f'Фаза {phase}: {values["count"]} раз, '
+                f'всего {values["total_seconds"]:.3f} с, '
+                f'в среднем {average:.2f} мс, '
+                f'максимум {values["max_seconds"] * 1000:.2f} мс'
+            )
+        for name, value in summary['counters'].items():
+            logging.info(f'Счётчик {name}: {value}')
+
+
+def enable_metrics():
+    """Включение сбора метрик; возвращает новый сборщик."""
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
+
+
+def disable_metrics():
+    global _metrics
+    _metrics = None
+
+
+def get_metrics():
+    return _metrics
+
+
+def measure(phase):
+    """
+    Контекстный менеджер замера времени фазы.
+    При выключенных метриках возвращает общий пустой контекст.
+    """
+    if _metrics is None:
+        return _DISABLED
+    return _metrics.timer(phase)
+
+
+def count(name, value=1):
+    if _metrics is not None:
+        _metrics.increment(name, value)
+
+
+def instrumented(phase):
+    """
+    Декоратор замера времени вызова функции.
+    При выключенных метриках функция вызывается без замера.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _metrics
+            if metrics is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(phase, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def record_response(response, seconds):
+    """
+    Учёт ответа на HTTP-запрос.
+    Для ответов из кеша учитывается время поиска в кеше, для остальных —
+    время до получения заголовков (соединение, TLS и ожидание сервера)
+    и время передачи тела.
+    """
+    metrics = _metrics
+    if metrics is None:
+        return
+    if getattr(response, 'from_cache', False):
+        metrics.increment('cache_hits')
+        metrics.observe('cache_lookup', seconds)
+    else:
+        server_seconds = response.elapsed.total_seconds()
+        metrics.increment('cache_misses')
+        metrics.increment('bytes_received', len(response.content))
+        metrics.observe('server', server_seconds)
+        metrics.observe('transfer', max(seconds - server_seconds, 0.0))
+    retries = getattr(getattr(response.raw, 'retries', None), 'history', ())
+    if retries:
+        metrics.increment('retries', len(retries))
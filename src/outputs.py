@@ -1,10 +1,27 @@
 import csv
+import json
 import logging
+import sqlite3
 from datetime import datetime
+from itertools import islice
 
-from prettytable import PrettyTable
 
-from constants import BASE_DIR, OUTPUT_FILE, OUTPUT_PRETTY, RESULTS_DIR
+from constants import (
+    BASE_DIR,
+    OUTPUT_ARROW,
+    OUTPUT_BATCH_SIZE,
+    OUTPUT_FILE,
+    OUTPUT_JSONL,
+    OUTPUT_PARQUET,
+    OUTPUT_PRETTY,
+    OUTPUT_SQLITE,
+    RESULT_COLUMNS,
+    RESULTS_DB,
+    RESULTS_DIR,
+)
+from exceptions import OutputError
+
+SQLITE_TYPES = {str: 'TEXT', int: 'INTEGER'}
 
 
 def control_output(results, cli_args):
@@ -12,6 +29,10 @@ def control_output(results, cli_args):
     output_options = {
         OUTPUT_PRETTY: pretty_output,
         OUTPUT_FILE: file_output,
+        OUTPUT_JSONL: jsonl_output,
+        OUTPUT_SQLITE: sqlite_output,
+        OUTPUT_PARQUET: parquet_output,
+        OUTPUT_ARROW: arrow_output,
         None: default_output
     }
 
@@ -20,30 +41,176 @@ def control_output(results, cli_args):
 
 
 def default_output(results, *args):
-    """Вывод результатов в консоль по умолчанию."""
+    """Вывод результатов в консоль по мере их получения."""
     for row in results:
-        print(' '.join(map(str, row)))
+        print(' '.join(map(str, row)), flush=True)
 
 
 def pretty_output(results, *args):
     """Вывод результатов в виде таблицы."""
+    from prettytable import PrettyTable
+
+    rows = iter(results)
     table = PrettyTable()
-    table.field_names = results[0]
-    table.add_rows(results[1:])
+    table.field_names = next(rows)
+    table.add_rows(list(rows))
     print(table)
 
 
-def file_output(results, cli_args):
-    """Сохранение результатов в CSV-файл."""
+def get_results_path(cli_args, extension):
+    """Путь к файлу результатов с отметкой времени в имени."""
     results_dir = BASE_DIR / RESULTS_DIR
     results_dir.mkdir(exist_ok=True)
     file_name = (
-        f"{cli_args.mode}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+        f"{cli_args.mode}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        f".{extension}"
     )
-    file_path = results_dir / file_name
+    return results_dir / file_name
+
+
+def file_output(results, cli_args):
+    """
+    Сохранение результатов в CSV-файл.
+    Строки записываются в файл по мере их получения.
+    """
+    rows = iter(results)
+    header = next(rows)
+    file_path = get_results_path(cli_args, 'csv')
 
-    with open(file_path, mode='w', encoding='utf-8') as csvfile:
+    with open(file_path, mode='w', encoding='utf-8', buffering=1) as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerows(results)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    logging.info(f'Файл с результатами был сохранён: {file_path}')
+
+
+def typed_batches(results, columns, size=OUTPUT_BATCH_SIZE):
+    """
+    Пропускает строку заголовка и отдаёт пачки строк,
+    значения которых приведены к типам колонок.
+    """
+    rows = iter(results)
+    next(rows)
+    typed_rows = (
+        tuple(
+            column_type(value)
+            for (_, column_type), value in zip(columns, row)
+        )
+        for row in rows
+    )
+    while True:
+        batch = list(islice(typed_rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def jsonl_output(results, cli_args):
+    """Сохранение результатов в файл JSON Lines."""
+    columns = RESULT_COLUMNS[cli_args.mode]
+    names = [name for name, _ in columns]
+    file_path = get_results_path(cli_args, 'jsonl')
+
+    with open(file_path, mode='w', encoding='utf-8') as jsonl_file:
+        for batch in typed_batches(results, columns):
+            jsonl_file.writelines(
+                json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n'
+                for row in batch
+            )
+
+    logging.info(f'Файл с результатами был сохранён: {file_path}')
+
+
+def sqlite_output(results, cli_args):
+    """
+    Добавление результатов в таблицу режима в базе SQLite.
+    Каждая строка помечается временем запуска.
+    """
+    columns = RESULT_COLUMNS[cli_args.mode]
+    table = cli_args.mode.replace('-', '_')
+    results_dir = BASE_DIR / RESULTS_DIR
+    results_dir.mkdir(exist_ok=True)
+    db_path = results_dir / RESULTS_DB
+    run_at = datetime.now().isoformat(timespec='seconds')
+
+    column_definitions = ', '.join(
+        f'{name} {SQLITE_TYPES[column_type]}' for name, column_type in columns
+    )
+    placeholders = ', '.join('?' for _ in range(len(columns) + 1))
+    connection = sqlite3.connect(db_path)
+    try:
+        with connection:
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} '
+                f'(run_at TEXT, {column_definitions})'
+            )
+            for batch in typed_batches(results, columns):
+                connection.executemany(
+                    f'INSERT INTO {table} VALUES ({placeholders})',
+                    ((run_at,) + row for row in batch),
+                )
+    finally:
+        connection.close()
+
+    logging.info(f'Результаты добавлены в таблицу {table} базы {db_path}')
+
+
+def import_pyarrow():
+    """Импорт pyarrow, необходимого для колоночных форматов."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise OutputError(
+            'Для форматов parquet и arrow установите пакет pyarrow.'
+        ) from e
+    return pyarrow
+
+
+def arrow_batches(pyarrow, results, columns):
+    """Схема Arrow и пачки строк результатов в колоночном виде."""
+    arrow_types = {str: pyarrow.string(), int: pyarrow.int64()}
+    schema = pyarrow.schema(
+        [(name, arrow_types[column_type]) for name, column_type in columns]
+    )
+    batches = (
+        pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(values, type=field.type)
+             for values, field in zip(zip(*batch), schema)],
+            schema=schema,
+        )
+        for batch in typed_batches(results, columns)
+    )
+    return schema, batches
+
+
+def parquet_output(results, cli_args):
+    """Сохранение результатов в файл Parquet."""
+    pyarrow = import_pyarrow()
+    from pyarrow import parquet
+
+    schema, batches = arrow_batches(
+        pyarrow, results, RESULT_COLUMNS[cli_args.mode]
+    )
+    file_path = get_results_path(cli_args, 'parquet')
+    with parquet.ParquetWriter(file_path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+    logging.info(f'Файл с результатами был сохранён: {file_path}')
+
+
+def arrow_output(results, cli_args):
+    """Сохранение результатов в файл Arrow IPC."""
+    pyarrow = import_pyarrow()
+    from pyarrow import ipc
+
+    schema, batches = arrow_batches(
+        pyarrow, results, RESULT_COLUMNS[cli_args.mode]
+    )
+    file_path = get_results_path(cli_args, 'arrow')
+    with ipc.new_file(file_path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
 
     logging.info(f'Файл с результатами был сохранён: {file_path}')
@@ -0,0 +1,223 @@
+import json
+import sys
+import threading
+import time
+
+from constants import (
+    PROGRESS_BAR,
+    PROGRESS_INTERVAL,
+    PROGRESS_JSON,
+    PROGRESS_SILENT,
+)
+
+UNIT_PAGES = 'стр.'
+UNIT_BYTES = 'B'
+
+
+class ProgressTask:
+    """
+    Счётчик выполненной работы одной задачи.
+    Обновляется из любых потоков; вывод получает снимки состояния
+    не чаще раза в interval секунд, поэтому частые обновления
+    (например, по блокам загружаемого файла) почти ничего не стоят.
+    """
+
+    def __init__(self, reporter, desc, total=None, unit=UNIT_PAGES):
+        self.reporter = reporter
+        self.desc = desc
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        # Работа, выполненная до начала задачи (например, при докачке),
+        # не учитывается в скорости.
+        self.initial = 0
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.reported = self.started
+        self.received_at_start = reporter.received
+        self.closed = False
+
+    def reset(self, total=None, done=0):
+        with self.lock:
+            self.total = total
+            self.done = self.initial = done
+            self.started = time.monotonic()
+
+    def update(self, amount=1):
+        with self.lock:
+            self.done += amount
+            now = time.monotonic()
+            if now - self.reported < self.reporter.interval:
+                return
+            self.reported = now
+            snapshot = self.snapshot(now)
+        self.reporter.show(self, snapshot)
+
+    def snapshot(self, now=None):
+        """
+        Состояние задачи: выполнено, скорость в единицах задачи
+        и байтах сети в секунду, оставшееся время.
+        Скорость считается по всему времени задачи, поэтому она
+        не зависит от того, сколько потоков обновляют счётчик.
+        """
+        elapsed = (now or time.monotonic()) - self.started
+        rate = (self.done - self.initial) / elapsed if elapsed > 0 else 0.0
+        received = self.reporter.received - self.received_at_start
+        eta = None
+        if self.total and rate:
+            eta = max(self.total - self.done, 0) / rate
+        return {
+            'task': self.desc,
+            'unit': self.unit,
+            'done': self.done,
+            'total': self.total,
+            'elapsed': round(elapsed, 3),
+            'rate': round(rate, 3),
+            'bytes_per_second': round(
+                received / elapsed if elapsed > 0 else 0.0
+            ),
+            'eta': None if eta is None else round(eta, 1),
+        }
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            snapshot = self.snapshot()
+        self.reporter.finish(self, snapshot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SilentReporter:
+    """
+    Вывод прогресса без вывода: только учёт задач и полученных байт.
+    Остальные способы вывода переопределяют start, show и finish.
+    """
+
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        self.interval = interval
+        self.received = 0
+        self.lock = threading.Lock()
+
+    def task(self, desc, total=None, unit=UNIT_PAGES):
+        task = ProgressTask(self, desc, total, unit)
+        self.start(task)
+        return task
+
+    def receive(self, length):
+        """Учёт байт, полученных по сети любой задачей."""
+        with self.lock:
+            self.received += length
+
+    def start(self, task):
+        pass
+
+    def show(self, task, snapshot):
+        pass
+
+    def finish(self, task, snapshot):
+        pass
+
+
+class JsonReporter(SilentReporter):
+    """События прогресса в формате JSON Lines для запусков без терминала."""
+
+    def __init__(self, interval=PROGRESS_INTERVAL, stream=None):
+        super().__init__(interval)
+        self.stream = stream or sys.stderr
+
+    def emit(self, event, snapshot):
+        line = json.dumps(dict(snapshot, event=event), ensure_ascii=False)
+        with self.lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+    def start(self, task):
+        self.emit('start', task.snapshot())
+
+    def show(self, task, snapshot):
+        self.emit('progress', snapshot)
+
+    def finish(self, task, snapshot):
+        self.emit('finish', snapshot)
+
+
+class BarReporter(SilentReporter):
+    """Индикаторы tqdm, по одному на каждую одновременную задачу."""
+
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        super().__init__(interval)
+        self.bars = {}
+
+    def start(self, task):
+        from tqdm import tqdm
+
+        with self.lock:
+            self.bars[task] = tqdm(
+                desc=task.desc,
+                total=task.total,
+                unit=task.unit,
+                unit_scale=task.unit == UNIT_BYTES,
+                mininterval=0,
+                position=len(self.bars),
+                leave=True,
+            )
+
+    @staticmethod
+    def describe(bar, task, snapshot):
+        bar.total = snapshot['total']
+        if task.unit != UNIT_BYTES:
+            megabytes = snapshot['bytes_per_second'] / 1024 / 1024
+            bar.set_postfix_str(f'{megabytes:.2f} MB/s', refresh=False)
+
+    def show(self, task, snapshot):
+        with self.lock:
+            bar = self.bars[task]
+            self.describe(bar, task, snapshot)
+            bar.update(snapshot['done'] - bar.n)
+
+    def finish(self, task, snapshot):
+        with self.lock:
+            bar = self.bars.pop(task)
+            self.describe(bar, task, snapshot)
+            bar.n = snapshot['done']
+            bar.close()
+
+
+REPORTERS = {
+    PROGRESS_BAR: BarReporter,
+    PROGRESS_JSON: JsonReporter,
+    PROGRESS_SILENT: SilentReporter,
+}
+
+# Активный способ вывода прогресса; по умолчанию прогресс не выводится.
+_reporter = SilentReporter()
+
+
+def set_progress(mode):
+    """Выбор способа вывода прогресса; возвращает новый вывод."""
+    global _reporter
+    _reporter = REPORTERS[mode]()
+    return _reporter
+
+
+def progress_task(desc, total=None, unit=UNIT_PAGES):
+    return _reporter.task(desc, total, unit)
+
+
+def track(iterable, desc, total=None, unit=UNIT_PAGES):
+    """Перебор элементов с учётом каждого обработанного элемента."""
+    with progress_task(desc, total, unit) as task:
+        for item in iterable:
+            yield item
+            task.update()
+
+
+def receive(length):
+    _reporter.receive(length)
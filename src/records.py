@@ -0,0 +1,115 @@
+import sys
+from enum import Enum
+from typing import NamedTuple, Tuple
+
+from constants import EXPECTED_STATUS
+
+UNKNOWN_STATUS = ('Неизвестный статус',)
+
+
+class _StrEnum(str, Enum):
+    """Перечисление строк, которое выводится и сериализуется как значение."""
+
+    def __str__(self):
+        return self.value
+
+
+# Статусы PEP из таблицы сокращений: один объект на статус вместо
+# отдельной строки в каждой записи.
+PepStatus = _StrEnum('PepStatus', {
+    status.upper(): status
+    for statuses in EXPECTED_STATUS.values()
+    for status in statuses
+})
+
+EXPECTED_PEP_STATUS = {
+    abbr: tuple(PepStatus(status) for status in statuses)
+    for abbr, statuses in EXPECTED_STATUS.items()
+}
+
+
+def pep_status(text):
+    """
+    Статус PEP как член PepStatus.
+    Статусы, которых нет в таблице сокращений, интернируются.
+    """
+    try:
+        return PepStatus(text)
+    except ValueError:
+        return sys.intern(text)
+
+
+class VersionRecord(NamedTuple):
+    """Версия Python из режима latest-versions."""
+
+    link: str
+    version: str
+    status: str
+
+
+class WhatsNewRecord(NamedTuple):
+    """Статья What's New из режима whats-new."""
+
+    link: str
+    title: str
+    editors: str
+
+
+class WhatsNewSectionRecord(NamedTuple):
+    """Раздел статьи What's New из режима whats-new-full."""
+
+    url: str
+    level: int
+    path: str
+    title: str
+    peps: str
+    modules: str
+
+
+class PepRecord(NamedTuple):
+    """Статус одного PEP: по таблице индекса и по странице PEP."""
+
+    number: int
+    link: str
+    table_status: Tuple[str, ...]
+    status: str
+
+    @property
+    def matches_table(self):
+        return self.status in self.table_status
+
+
+class StatusCount(NamedTuple):
+    """Строка результата режима pep: статус и число PEP."""
+
+    status: str
+    count: int
+
+
+class StatusChange(NamedTuple):
+    """
+    Переход статуса PEP между запусками режима pep-diff.
+    У нового PEP нет прежнего статуса, у удалённого — нового.
+    """
+
+    link: str
+    old_status: str
+    new_status: str
+
+
+class MismatchRecord(NamedTuple):
+    """
+    Расхождение статуса на странице PEP с таблицей индекса.
+    Текст сообщения собирается только при выводе записи.
+    """
+
+    link: str
+    status: str
+    expected: Tuple[str, ...]
+
+    def __str__(self):
+        return (
+            f'Несовпадающие статусы:\n{self.link}\n'
+            f'Статус в карточке: {self.status}\n'
+            f'Ожидаемые статусы: {", ".join(self.expected)}'
+        )
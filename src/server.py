@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from constants import RESULT_COLUMNS
+from metrics import get_metrics
+from outputs import typed_batches
+
+
+class ResultCache:
+    """
+    Результаты режимов парсера в памяти, готовые к отдаче.
+    modes — словарь {режим: функция без аргументов, возвращающая
+    строки результата}. JSON собирается при обновлении, поэтому
+    ответ на запрос не требует ни разбора, ни сериализации.
+    after_refresh — функция без аргументов, вызываемая после
+    обновления всех режимов (например, для обслуживания кешей).
+    """
+
+    def __init__(self, modes, after_refresh=None):
+        self.modes = modes
+        self.after_refresh = after_refresh
+        self.lock = threading.Lock()
+        self.payloads = {}
+
+    def refresh(self, mode):
+        started = time.perf_counter()
+        columns = RESULT_COLUMNS[mode]
+        names = [name for name, _ in columns]
+        results = [
+            dict(zip(names, row))
+            for batch in typed_batches(self.modes[mode](), columns)
+            for row in batch
+        ]
+        body = json.dumps({
+            'mode': mode,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'refresh_seconds': round(time.perf_counter() - started, 3),
+            'results': results,
+        }, ensure_ascii=False).encode('utf-8')
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        with self.lock:
+            self.payloads[mode] = (body, etag)
+        logging.info(f'Результаты режима {mode} обновлены.')
+
+    def refresh_all(self):
+        for mode in self.modes:
+            try:
+                self.refresh(mode)
+            except Exception as e:
+                logging.exception(
+                    f'Не удалось обновить результаты режима {mode}: {e}'
+                )
+        if self.after_refresh is None:
+            return
+        try:
+            self.after_refresh()
+        except Exception as e:
+            logging.exception(f'Ошибка после обновления результатов: {e}')
+
+    def get(self, mode):
+        """Тело ответа и ETag или None, если результатов ещё нет."""
+        with self.lock:
+            return self.payloads.get(mode)
+
+
+class ResultsHandler(BaseHTTPRequestHandler):
+    """Ответы с результатами режимов: GET /<режим>."""
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.strip('/')
+        results = self.server.results
+        if path == 'metrics' and get_metrics() is not None:
+            self.send_body(
+                HTTPStatus.OK,
+                get_metrics().to_prometheus().encode('utf-8'),
+                content_type='text/plain; version=0.0.4',
+            )
+            return
+        if path not in results.modes:
+            self.send_error_json(
+                HTTPStatus.NOT_FOUND,
+                f'Доступные режимы: {", ".join(results.modes)}',
+            )
+            return
+        payload = results.get(path)
+        if payload is None:
+            self.send_error_json(
+                HTTPStatus.SERVICE_UNAVAILABLE, 'Результаты ещё не готовы.',
+                headers={'Retry-After': '5'},
+            )
+            return
+        body, etag = payload
+        if self.headers.get('If-None-Match') == etag:
+            self.send_body(HTTPStatus.NOT_MODIFIED, b'', headers={
+                'ETag': etag
+            })
+            return
+        self.send_body(HTTPStatus.OK, body, headers={'ETag': etag})
+
+    def send_error_json(self, status, message, headers=None):
+        body = json.dumps({'error': message}, ensure_ascii=False)
+        self.send_body(status, body.encode('utf-8'), headers=headers)
+
+    def send_body(self, status, body, content_type='application/json',
+                  headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f'{self.address_string()} {format % args}')
+
+
+def create_server(results, host, port):
+    server = ThreadingHTTPServer((host, port), ResultsHandler)
+    server.results = results
+    return server
+
+
+def refresh_periodically(results, interval, stop):
+    """Обновление результатов раз в interval секунд до установки stop."""
+    while True:
+        results.refresh_all()
+        if stop.wait(interval):
+            return
+
+
+def serve_results(results, host, port, refresh_interval):
+    """
+    Запуск HTTP-сервера с результатами.
+    Результаты обновляются в фоновом потоке; до первого обновления
+    сервер отвечает 503.
+    """
+    server = create_server(results, host, port)
+    stop = threading.Event()
+    refresher = threading.Thread(
+        target=refresh_periodically,
+        args=(results, refresh_interval, stop),
+        daemon=True,
+    )
+    refresher.start()
+    logging.info(f'Сервер запущен: http://{host}:{server.server_port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info('Сервер остановлен.')
+    finally:
+        stop.set()
+        server.server_close()
@@ -0,0 +1,240 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+PEP_FIELDS = (
+    'url',
+    'table_status',
+    'page_status',
+    'etag',
+    'last_modified',
+    'content_hash',
+)
+
+CREATE_PEPS_TABLE = '''
+CREATE TABLE IF NOT EXISTS peps (
+    url TEXT PRIMARY KEY,
+    table_status TEXT NOT NULL,
+    page_status TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL
+)
+'''
+# Версия схемы и ключа кеша извлечённых данных; при изменении
+# таблица пересоздаётся.
+EXTRACTIONS_SCHEMA_VERSION = 2
+CREATE_EXTRACTIONS_TABLE = '''
+CREATE TABLE IF NOT EXISTS extractions (
+    extractor TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    records TEXT NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (extractor, content_hash)
+)
+'''
+# Сколько секунд запись ждёт, пока базу освободит другой процесс.
+BUSY_TIMEOUT = 5.0
+SAVE_PEP = (
+    f'INSERT OR REPLACE INTO peps ({", ".join(PEP_FIELDS)}) '
+    f'VALUES ({", ".join(":" + field for field in PEP_FIELDS)})'
+)
+
+
+def connect(path):
+    """
+    Соединение с базой, которую одновременно используют несколько
+    запусков парсера. Изменения фиксируются короткими транзакциями:
+    в режиме WAL чтение не ждёт записи, а synchronous=NORMAL делает
+    фиксацию каждой записи дешёвой.
+    """
+    connection = sqlite3.connect(
+        str(path), timeout=BUSY_TIMEOUT, check_same_thread=False
+    )
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class PepStore:
+    """
+    Хранилище результатов режима pep между запусками.
+    Записи загружаются в память при открытии, поэтому чтение
+    из потоков не обращается к базе; запись защищена блокировкой
+    и фиксируется сразу. Если записать в базу не удалось (например,
+    её занял другой запуск), запись остаётся только в памяти,
+    а PEP будет разобран заново при следующем запуске.
+    """
+
+    def __init__(self, path):
+        self.connection = connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(CREATE_PEPS_TABLE)
+        self.lock = threading.Lock()
+        self.records = {
+            row['url']: dict(row)
+            for row in self.connection.execute('SELECT * FROM peps')
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, url):
+        """Запись о PEP из прошлого запуска или None."""
+        return self.records.get(url)
+
+    def save(self, record):
+        """Сохранение записи о PEP."""
+        with self.lock:
+            self.records[record['url']] = record
+            try:
+                with self.connection:
+                    self.connection.execute(SAVE_PEP, record)
+            except sqlite3.Error as e:
+                logging.warning(
+                    f'Запись о {record["url"]} не сохранена: {e}'
+                )
+
+    def prune(self, urls):
+        """Удаление PEP, которых больше нет в индексе."""
+        stale = set(self.records) - set(urls)
+        with self.lock:
+            for url in stale:
+                del self.records[url]
+            try:
+                with self.connection:
+                    self.connection.executemany(
+                        'DELETE FROM peps WHERE url = ?',
+                        ((url,) for url in stale),
+                    )
+            except sqlite3.Error as e:
+                logging.warning(f'Удалённые PEP не убраны из хранилища: {e}')
+        return stale
+
+    def close(self):
+        self.connection.close()
+
+
+def _as_tuples(value):
+    """
+    Списки из JSON обратно в кортежи. Результат, только что
+    полученный от парсера, приводится к тому же виду, чтобы он
+    не отличался от результата из кеша.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_as_tuples(item) for item in value)
+    return value
+
+
+class ExtractionCache:
+    """
+    Результаты функций извлечения данных между запусками.
+    Ключ — версия функции и хеш адреса и содержимого страницы, поэтому
+    неизменённые страницы повторно не разбираются, а после изменения
+    кода функции старые результаты не используются.
+    Каждый результат сохраняется отдельной транзакцией. Ошибки базы
+    (например, база занята другим запуском) не прерывают разбор:
+    результат считается отсутствующим в кеше.
+    При сохранении и закрытии удаляются давно не использованные
+    записи сверх max_entries.
+    """
+
+    def __init__(self, path, max_entries):
+        self.max_entries = max_entries
+        self.connection = connect(path)
+        version = self.connection.execute('PRAGMA user_version').fetchone()
+        if version[0] != EXTRACTIONS_SCHEMA_VERSION:
+            self.connection.execute('DROP TABLE IF EXISTS extractions')
+            self.connection.execute(
+                f'PRAGMA user_version = {EXTRACTIONS_SCHEMA_VERSION}'
+            )
+        self.connection.execute(CREATE_EXTRACTIONS_TABLE)
+        self.lock = threading.Lock()
+        self.used = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, extractor, content_hash):
+        """Сохранённый результат или None."""
+        with self.lock:
+            try:
+                row = self.connection.execute(
+                    'SELECT records FROM extractions '
+                    'WHERE extractor = ? AND content_hash = ?',
+                    (extractor, content_hash),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logging.warning(f'Кеш извлечённых данных недоступен: {e}')
+                return None
+            if row is None:
+                return None
+            self.used.add((extractor, content_hash))
+        return _as_tuples(json.loads(row[0]))
+
+    def save(self, extractor, content_hash, records):
+        """
+        Сохранение результата; возвращает его в виде, как get,
+        даже если сохранить результат не удалось.
+        """
+        try:
+            data = json.dumps(
+                records, ensure_ascii=False, separators=(',', ':')
+            )
+            with self.lock:
+                with self.connection:
+                    self.connection.execute(
+                        'INSERT OR REPLACE INTO extractions '
+                        '(extractor, content_hash, records, used_at) '
+                        'VALUES (?, ?, ?, ?)',
+                        (extractor, content_hash, data, time.time()),
+                    )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.warning(f'Результат разбора не сохранён в кеше: {e}')
+        return _as_tuples(records)
+
+    def evict(self):
+        """Удаление давно не использованных записей сверх max_entries."""
+        with self.lock, self.connection:
+            now = time.time()
+            self.connection.executemany(
+                'UPDATE extractions SET used_at = ? '
+                'WHERE extractor = ? AND content_hash = ?',
+                ((now, *key) for key in self.used),
+            )
+            self.used.clear()
+            count = self.connection.execute(
+                'SELECT COUNT(*) FROM extractions'
+            ).fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self.connection.execute(
+                    'DELETE FROM extractions WHERE rowid IN ('
+                    'SELECT rowid FROM extractions '
+                    'ORDER BY used_at LIMIT ?)',
+                    (excess,),
+                )
+        return max(excess, 0)
+
+    def flush(self):
+        """
+        Удаление лишних записей. Ошибка базы не прерывает работу:
+        записи будут удалены при следующем вызове.
+        """
+        try:
+            return self.evict()
+        except sqlite3.Error as e:
+            logging.warning(f'Кеш извлечённых данных не очищен: {e}')
+            return 0
+
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,220 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from constants import (
+    DEFAULT_MAX_PER_HOST,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RETRIES,
+    HEALTHY_LATENCY_FACTOR,
+    MAX_RETRY_DELAY,
+    MIN_HEALTHY_LATENCY,
+    RETRY_BACKOFF,
+    RETRY_METHODS,
+    RETRY_STATUSES,
+)
+from metrics import count
+
+
+class TokenBucket:
+    """
+    Ограничение частоты запросов: rate запросов в секунду
+    с допустимым всплеском до capacity запросов.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate,
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    Число одновременных запросов к хосту по правилу AIMD.
+    Перегрузка (429, 5xx, обрыв соединения) уменьшает предел вдвое,
+    быстрый ответ увеличивает его примерно на единицу за «окно»
+    запросов, но не выше maximum.
+    """
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.limit = float(max(1, maximum // 2))
+        self.active = 0
+        self.best_latency = None
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    def release(self, latency=None, overloaded=False):
+        with self.condition:
+            self.active -= 1
+            if overloaded:
+                self.limit = max(1.0, self.limit / 2)
+            elif latency is not None and self.is_healthy(latency):
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def is_healthy(self, latency):
+        """Ответ не медленнее лучшего наблюдавшегося в несколько раз."""
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        return latency <= max(
+            self.best_latency * HEALTHY_LATENCY_FACTOR, MIN_HEALTHY_LATENCY
+        )
+
+
+class HostThrottle:
+    """Частота, параллельность и пауза запросов к одному хосту."""
+
+    def __init__(self, rate, max_concurrency):
+        self.bucket = TokenBucket(rate, max_concurrency) if rate else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.resume_at = 0.0
+
+    def acquire(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if self.bucket is not None:
+            self.bucket.acquire()
+        self.concurrency.acquire()
+
+    def release(self, latency=None, overloaded=False):
+        self.concurrency.release(latency, overloaded)
+
+    def pause(self, seconds):
+        """Приостановка всех запросов к хосту, например по Retry-After."""
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+
+def retry_after_seconds(response):
+    """Задержка из заголовка Retry-After в секундах или None."""
+    value = response.headers.get('Retry-After', '').strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt):
+    """Экспоненциальная задержка со случайной составляющей (full jitter)."""
+    return random.uniform(
+        0, min(MAX_RETRY_DELAY, RETRY_BACKOFF * 2 ** attempt)
+    )
+
+
+class ThrottledAdapter(HTTPAdapter):
+    """
+    Транспорт с ограничением частоты и параллельности запросов
+    к каждому хосту и повтором запросов после 429, 5xx и обрывов.
+    Стоит под HTTP-кешем, поэтому ответы из кеша не ограничиваются.
+    """
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST,
+                 rate=DEFAULT_RATE_LIMIT, retries=DEFAULT_RETRIES):
+        super().__init__(pool_maxsize=max_per_host, pool_block=True)
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.retries = retries
+        self.hosts = {}
+        self.hosts_lock = threading.Lock()
+
+    def host_throttle(self, url):
+        host = urlsplit(url).netloc
+        with self.hosts_lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostThrottle(self.rate, self.max_per_host)
+            return self.hosts[host]
+
+    def send(self, request, **kwargs):
+        throttle = self.host_throttle(request.url)
+        retries = self.retries if request.method in RETRY_METHODS else 0
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            response, delay = self.attempt(
+                throttle, request, last_attempt, attempt, **kwargs
+            )
+            if delay is None:
+                return response
+            count('retries')
+            logging.warning(
+                f'Повтор запроса {request.url} через {delay:.1f} с '
+                f'({attempt + 1}/{retries})'
+            )
+            time.sleep(delay)
+
+    def attempt(self, throttle, request, last_attempt, attempt, **kwargs):
+        """
+        Одна попытка запроса.
+        Возвращает ответ и задержку перед повтором; задержка None
+        означает, что повтор не нужен.
+        """
+        throttle.acquire()
+        started = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except (ConnectionError, Timeout):
+            throttle.release(overloaded=True)
+            if last_attempt:
+                raise
+            return None, backoff_delay(attempt)
+
+        overloaded = response.status_code in RETRY_STATUSES
+        throttle.release(time.monotonic() - started, overloaded)
+        if not overloaded or last_attempt:
+            return response, None
+        response.close()
+        delay = retry_after_seconds(response)
+        if delay is None:
+            return None, backoff_delay(attempt)
+        delay = min(delay, MAX_RETRY_DELAY)
+        throttle.pause(delay)
+        return None, delay
+
+
+def mount_throttled_adapter(session, max_per_host=DEFAULT_MAX_PER_HOST,
+                            rate=DEFAULT_RATE_LIMIT,
+                            retries=DEFAULT_RETRIES):
+    """
+    Подключает к сессии транспорт с ограничением запросов к хостам.
+    Одновременных соединений с хостом не больше max_per_host,
+    лишние запросы ждут свободного соединения.
+    """
+    adapter = ThrottledAdapter(max_per_host, rate, retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
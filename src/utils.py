@@ -1,25 +1,329 @@
+import hashlib
 import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from http import HTTPStatus
+from pathlib import Path
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-from requests import RequestException
-
-from constants import EXPECTED_STATUS, PEP_INDEX_URL
+from constants import (
+    DEFAULT_PARSER_ENGINE,
+    DEFAULT_PROCESSES,
+    DEFAULT_WORKERS,
+    PEP_API_URL,
+    PEP_INDEX_URL,
+)
 from exceptions import ParserFindTagException, FetchError
+from metrics import count, instrumented, measure, record_response
+from progress import receive
+from records import EXPECTED_PEP_STATUS, UNKNOWN_STATUS
+
+# Кеш результатов функций извлечения данных; None — кеш выключен.
+_extraction_cache = None
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных запросов.
+    Пока первый запрос по ключу выполняется, остальные ждут
+    и получают его результат или исключение.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+        if not leader:
+            count('deduplicated_requests')
+            return future.result()
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                del self.calls[key]
+        return future.result()
+
 
+_requests_in_flight = SingleFlight()
 
-def get_response(session, url, encoding='utf-8'):
+
+def get_response(session, url, encoding='utf-8', headers=None):
     """
     Обрабатывает запросы и перехватывает сетевые ошибки.
+    Одинаковые одновременные запросы без заголовков выполняются
+    один раз, например общие страницы при запуске нескольких режимов.
     """
+    if headers is not None:
+        return _get_response(session, url, encoding, headers)
+    return _requests_in_flight.do(
+        (id(session), url, encoding),
+        partial(_get_response, session, url, encoding),
+    )
+
+
+def _get_response(session, url, encoding, headers=None):
+    from requests import RequestException
+
+    started = time.perf_counter()
     try:
-        response = session.get(url)
+        response = session.get(url, headers=headers)
         response.encoding = encoding
+        record_response(response, time.perf_counter() - started)
+        if not getattr(response, 'from_cache', False):
+            receive(len(response.content))
         return response
     except RequestException as e:
         raise FetchError(f'Ошибка при загрузке страницы {url}: {e}') from e
 
 
+def get_conditional_response(session, url, etag=None, last_modified=None):
+    """
+    Условный запрос страницы в обход HTTP-кеша.
+    Если страница не менялась, сервер отвечает 304 без тела.
+    """
+    headers = {'Cache-Control': 'no-store'}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return get_response(session, url, headers=headers)
+
+
+def _oldest_cache_keys(cache, count):
+    """
+    Ключи count самых давно сохранённых ответов HTTP-кеша.
+    Ответы не загружаются: в SQLite порядок сохранения задаёт rowid
+    (INSERT OR REPLACE выдаёт перезаписанному ответу новый), в файловом
+    кеше — время изменения файла. Только ответы в памяти, которые
+    не сериализуются, сортируются по created_at.
+    """
+    from requests_cache import FileCache, SQLiteCache
+
+    responses = cache.responses
+    if isinstance(cache, SQLiteCache):
+        with responses.connection() as connection:
+            return [row[0] for row in connection.execute(
+                f'SELECT key FROM {responses.table_name} '
+                'ORDER BY rowid LIMIT ?',
+                (count,),
+            )]
+    if isinstance(cache, FileCache):
+        def saved_at(key):
+            path = responses.cache_dir / f'{key}{responses.extension}'
+            return path.stat().st_mtime_ns
+
+        return sorted(responses, key=saved_at)[:count]
+    oldest = sorted(responses.items(), key=lambda item: item[1].created_at)
+    return [key for key, _ in oldest[:count]]
+
+
+def trim_cache(cache, max_entries):
+    """
+    Ограничивает число ответов в HTTP-кеше.
+    Сначала удаляются просроченные ответы, затем самые давно
+    сохранённые: активно используемые ответы регулярно обновляются
+    и остаются в кеше. В SQLite оба шага выполняются запросами
+    без загрузки ответов; файловому кешу для поиска просроченных
+    ответов приходится их читать.
+    """
+    cache.delete(expired=True)
+    excess = len(cache.responses) - max_entries
+    if excess <= 0:
+        return 0
+    cache.delete(*_oldest_cache_keys(cache, excess))
+    logging.info(f'Из кеша удалено ответов: {excess}')
+    return excess
+
+
+def map_concurrently(func, items, workers=DEFAULT_WORKERS):
+    """
+    Выполняет func для каждого элемента в пуле потоков.
+    Отдаёт futures в порядке исходных элементов.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(func, item) for item in items]
+        yield from futures
+
+
+def fetch_body(session, url):
+    """
+    Загрузка страницы и возврат её тела в байтах.
+    Тело передаётся разборщикам без декодирования в строку.
+    """
+    return get_response(session, url).content
+
+
+def set_extraction_cache(cache):
+    """Подключение кеша извлечённых данных для всех режимов."""
+    global _extraction_cache
+    _extraction_cache = cache
+
+
+def flush_extraction_cache():
+    """Сохранение кеша извлечённых данных, если он подключён."""
+    if _extraction_cache is not None:
+        _extraction_cache.flush()
+
+
+@lru_cache(maxsize=None)
+def extractor_version(extractor):
+    """
+    Версия функции извлечения данных: её имя и хеш исходного кода
+    модуля, в котором она определена. Любое изменение этого модуля
+    делает сохранённые результаты недействительными.
+    """
+    module_path = Path(sys.modules[extractor.__module__].__file__)
+    source_hash = hashlib.sha256(module_path.read_bytes()).hexdigest()
+    return f'{extractor.__module__}.{extractor.__qualname__}:{source_hash}'
+
+
+def _cache_key(extractor, html, url):
+    """
+    Ключ кеша извлечённых данных. Парсеры получают адрес страницы
+    и могут включать его в результат, поэтому он входит в ключ
+    вместе с содержимым страницы.
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    content_hash = hashlib.sha256(url.encode('utf-8'))
+    content_hash.update(b'\0')
+    content_hash.update(html)
+    return extractor_version(extractor), content_hash.hexdigest()
+
+
+def _cached_records(cache, cache_key):
+    records = cache.get(*cache_key)
+    count(
+        'extraction_cache_misses' if records is None
+        else 'extraction_cache_hits'
+    )
+    return records
+
+
+def extract_with_cache(extractor, html, url):
+    """
+    Извлечение данных из страницы с учётом кеша извлечённых данных.
+    Неизменённая страница повторно не разбирается.
+    """
+    cache = _extraction_cache
+    if cache is None:
+        return extractor(html, url)
+    cache_key = _cache_key(extractor, html, url)
+    records = _cached_records(cache, cache_key)
+    if records is None:
+        records = cache.save(*cache_key, extractor(html, url))
+    return records
+
+
+def fetch_and_extract(session, url, extractor):
+    """Загрузка страницы и извлечение из неё данных."""
+    return extract_with_cache(extractor, fetch_body(session, url), url)
+
+
+def _copy_future_result(target, cache, cache_key, source):
+    """
+    Переносит результат или исключение одного future в другой
+    и сохраняет результат в кеше извлечённых данных.
+    """
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+        return
+    records = source.result()
+    if cache is not None:
+        try:
+            records = cache.save(*cache_key, records)
+        except Exception as e:
+            # Исключение в callback теряется, и target не был бы
+            # завершён никогда.
+            logging.warning(f'Результат разбора не сохранён в кеше: {e}')
+    target.set_result(records)
+
+
+def _hand_over_to_parser(parsers, extractor, url, result, fetch_future):
+    """
+    Передаёт загруженную страницу на разбор в пул процессов.
+    Страницы, результат разбора которых есть в кеше, не передаются.
+    """
+    cache, cache_key = _extraction_cache, None
+    try:
+        html = fetch_future.result()
+        if cache is not None:
+            cache_key = _cache_key(extractor, html, url)
+            records = _cached_records(cache, cache_key)
+            if records is not None:
+                result.set_result(records)
+                return
+        parse_future = parsers.submit(extractor, html, url)
+    except Exception as e:
+        result.set_exception(e)
+        return
+    parse_future.add_done_callback(
+        partial(_copy_future_result, result, cache, cache_key)
+    )
+
+
+def _parser_context():
+    """
+    Способ запуска процессов разбора.
+    Процессы пула создаются при передаче первой страницы, когда уже
+    работают потоки загрузки, а в пакетном режиме и режиме serve —
+    ещё и потоки других режимов. fork из многопоточного процесса
+    копирует захваченные ими блокировки (например, блокировку метрик),
+    и процесс разбора может зависнуть на них навсегда. forkserver
+    создаёт процессы из отдельного однопоточного процесса.
+    """
+    import multiprocessing
+
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+
+def extract_concurrently(session, urls, extractor,
+                         workers=DEFAULT_WORKERS,
+                         processes=DEFAULT_PROCESSES):
+    """
+    Загружает страницы в пуле потоков и извлекает из них данные.
+    При processes > 0 разбор выполняется в пуле процессов,
+    а в основной процесс возвращаются только результаты extractor.
+    Отдаёт futures в порядке urls.
+    """
+    if not processes:
+        yield from map_concurrently(
+            partial(fetch_and_extract, session, extractor=extractor),
+            urls,
+            workers,
+        )
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes,
+                             mp_context=_parser_context()) as parsers, \
+            ThreadPoolExecutor(max_workers=workers) as fetchers:
+        results = []
+        for url in urls:
+            result = Future()
+            fetchers.submit(fetch_body, session, url).add_done_callback(
+                partial(_hand_over_to_parser, parsers, extractor, url, result)
+            )
+            results.append(result)
+        yield from results
+
+
+@instrumented('select')
 def find_tag(soup, tag, attrs=None, string=None):
     """
     Ищет тег в переданном объекте BeautifulSoup.
@@ -32,71 +336,316 @@ def find_tag(soup, tag, attrs=None, string=None):
     return searched_tag
 
 
-def fetch_and_parse(session, url, encoding='utf-8', parser='lxml'):
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+# Объявление кодировки ищется в начале страницы, как это делают браузеры.
+META_CHARSET_PRESCAN = 1024
+
+
+def declared_encoding(body, default='utf-8'):
+    """Кодировка из <meta charset> в начале страницы или default."""
+    match = META_CHARSET.search(body, 0, META_CHARSET_PRESCAN)
+    return match.group(1).decode('ascii') if match else default
+
+
+def parse_html(html, parser='lxml', scope=None, encoding=None):
+    """
+    Создание объекта BeautifulSoup.
+    html — строка или байты; байты передаются lxml без декодирования
+    в строку, в кодировке encoding или объявленной на странице.
+    scope — аргументы SoupStrainer (name, attrs): если задан, в дерево
+    попадают только подходящие теги с их содержимым, а остальная
+    разметка пропускается без создания объектов.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    parse_only = SoupStrainer(**scope) if scope else None
+    if isinstance(html, str):
+        return BeautifulSoup(html, parser, parse_only=parse_only)
+    return BeautifulSoup(
+        html, parser, parse_only=parse_only,
+        from_encoding=encoding or declared_encoding(html),
+    )
+
+
+def fetch_and_parse(session, url, encoding=None, parser='lxml',
+                    scope=None):
     """
     Загрузка страницы по URL и создание объекта BeautifulSoup.
-    Позволяет задать кодировку и тип парсера.
+    Позволяет задать кодировку (по умолчанию — объявленная
+    на странице), тип парсера и область разбора scope (см. parse_html).
     """
-    response = get_response(session, url, encoding=encoding)
-    return BeautifulSoup(response.text, parser)
+    response = get_response(session, url)
+    with measure('parse'):
+        return parse_html(response.content, parser, scope, encoding)
 
 
-def extract_rows_from_tables(soup):
+class PepIndexEntry:
     """
-    Извлекает все строки из всех таблиц на странице.
+    PEP из индекса peps.python.org.
+    PEP встречается в таблице своей категории и в числовом индексе,
+    поэтому для каждого PEP хранится список разделов, в которых
+    он указан.
+    """
+
+    __slots__ = ('number', 'link', 'table_status', 'sections')
+
+    def __init__(self, number, link, table_status, section):
+        self.number = number
+        self.link = link
+        self.table_status = table_status
+        self.sections = [section]
+
+    def __repr__(self):
+        return f'PepIndexEntry({self.number}, {self.sections})'
+
+
+def get_section_title(table):
+    """Заголовок раздела, к которому относится таблица."""
+    heading = table.find_previous(['h2', 'h3'])
+    if heading is None:
+        return ''
+    return heading.text.replace('¶', '').strip()
+
+
+def extract_table_rows(table, table_index):
+    tbody = table.find('tbody')
+    if tbody is None:
+        raise ParserFindTagException(
+            f'Ошибка обработки таблицы {table_index}: не найден tbody'
+        )
+    rows = tbody.find_all('tr')
+    logging.info(f'Таблица {table_index}: Найдено строк {len(rows)}.')
+    return rows
+
+
+def add_index_row(entries, row, table_index, section, warnings):
+    """Добавляет строку таблицы в индекс, объединяя PEP по номеру."""
+    try:
+        number, table_status, pep_link = parse_row(row, table_index)
+    except ParserFindTagException as e:
+        warnings.append(f'Ошибка при обработке строки: {e}')
+        return
+    entry = entries.get(number)
+    if entry is None:
+        entries[number] = PepIndexEntry(
+            number, pep_link, table_status, section
+        )
+        return
+    entry.sections.append(section)
+    if entry.table_status != table_status:
+        warnings.append(
+            f'PEP {number} указан с разными статусами в разделах '
+            f'{entry.sections}'
+        )
+
+
+def extract_pep_index(soup, warnings):
+    """
+    Собирает PEP из всех таблиц индекса без повторов.
+    Возвращает записи PepIndexEntry в порядке первого появления.
     """
     tables = soup.find_all('table')
     if not tables:
         raise ParserFindTagException('На странице не найдено таблиц.')
 
-    logging.info(f'Найдено таблиц: {len(tables)}')
-    all_rows = []
+    entries = {}
+    rows_count = 0
     for table_index, table in enumerate(tables, start=1):
-        try:
-            rows = table.find('tbody').find_all('tr')
-            logging.info(
-                f'Таблица {table_index}: '
-                f'Найдено строк {len(rows)}.'
-            )
-            all_rows.extend(rows)
-        except Exception as e:
-            raise ParserFindTagException(
-                f'Ошибка обработки таблицы {table_index}: {e}'
-            ) from e
-    return all_rows
+        section = get_section_title(table)
+        rows = extract_table_rows(table, table_index)
+        rows_count += len(rows)
+        for row in rows:
+            add_index_row(entries, row, table_index, section, warnings)
+    logging.info(
+        f'Найдено таблиц: {len(tables)}, строк: {rows_count}, '
+        f'уникальных PEP: {len(entries)}'
+    )
+    return list(entries.values())
 
 
 def parse_row(row, table_index):
     """
-    Обрабатывает строку таблицы и возвращает статус и ссылку.
+    Обрабатывает строку таблицы и возвращает номер PEP, статусы
+    и ссылку.
+    Первая буква сокращения в таблице — тип PEP, вторая — статус;
+    у черновиков буквы статуса нет.
     """
     columns = row.find_all('td')
-    if len(columns) < 2:
+    if len(columns) < 2 or columns[1].find('a') is None:
         raise ParserFindTagException(
             f'Пропущена строка таблицы {table_index} '
             'с недостаточным числом колонок.'
         )
 
     table_status_abbr = columns[0].text.strip()
-    table_status = EXPECTED_STATUS.get(
-        table_status_abbr[0], ('Неизвестный статус',)
+    table_status = EXPECTED_PEP_STATUS.get(
+        table_status_abbr[1:], UNKNOWN_STATUS
     )
-    pep_link = urljoin(PEP_INDEX_URL, columns[1].find('a')['href'])
+    pep_a_tag = columns[1].find('a')
+    pep_link = urljoin(PEP_INDEX_URL, pep_a_tag['href'])
+    number = pep_a_tag.text.strip()
     logging.debug(
         f'Таблица {table_index}: статус "{table_status_abbr}", '
         f'ссылка {pep_link}'
     )
-    return table_status, pep_link
+    return int(number) if number.isdigit() else number, table_status, pep_link
+
+
+PEP_STATUS_XPATH = (
+    '//dt[contains(., "Status")]/following-sibling::*[1][self::dd]'
+)
 
 
-def extract_status_from_pep_page(session, pep_link):
+@instrumented('extract_status')
+def extract_status_from_html(html, pep_link):
     """
-    Извлекает статус PEP со страницы PEP.
+    Извлекает статус PEP из HTML страницы PEP.
     """
-    pep_soup = fetch_and_parse(session, pep_link)
-    status_dd = pep_soup.select_one('dt:contains("Status") + dd')
+    with measure('parse'):
+        pep_soup = parse_html(html)
+    with measure('select'):
+        status_dd = pep_soup.select_one('dt:contains("Status") + dd')
     if not status_dd:
         raise ParserFindTagException(
             f'Статус на странице {pep_link} не найден.'
         )
     return status_dd.text.strip()
+
+
+def _pep_header_fragment(html):
+    """
+    Возвращает фрагмент с первым списком <dl> страницы PEP,
+    в котором находятся статус, тип и авторы.
+    """
+    if isinstance(html, bytes):
+        open_tag, close_tag = b'<dl', b'</dl>'
+    else:
+        open_tag, close_tag = '<dl', '</dl>'
+    start = html.find(open_tag)
+    end = html.find(close_tag, start)
+    if start == -1 or end == -1:
+        return None
+    fragment = html[start:end + len(close_tag)]
+    if isinstance(fragment, bytes):
+        # Во фрагменте нет объявления кодировки, поэтому небольшой
+        # фрагмент декодируется здесь, а не всей страницей.
+        return fragment.decode(declared_encoding(html), 'replace')
+    return fragment
+
+
+@instrumented('extract_status')
+def extract_status_with_lxml(html, pep_link):
+    """
+    Извлекает статус PEP без построения дерева BeautifulSoup.
+    Разбирается только заголовочный <dl>, а при его отсутствии —
+    вся страница.
+    """
+    from lxml import html as lxml_html
+
+    for fragment in (_pep_header_fragment(html), html):
+        if not fragment:
+            continue
+        status_dd = lxml_html.fromstring(fragment).xpath(PEP_STATUS_XPATH)
+        if status_dd:
+            return status_dd[0].text_content().strip()
+    raise ParserFindTagException(
+        f'Статус на странице {pep_link} не найден.'
+    )
+
+
+STATUS_EXTRACTORS = {
+    'bs4': extract_status_from_html,
+    'lxml': extract_status_with_lxml,
+}
+
+
+def extract_status_from_pep_page(session, pep_link,
+                                 parser_engine=DEFAULT_PARSER_ENGINE):
+    """
+    Извлекает статус PEP со страницы PEP.
+    """
+    extractor = STATUS_EXTRACTORS[parser_engine]
+    return fetch_and_extract(session, pep_link, extractor)
+
+
+def fetch_pep_api_statuses(session):
+    """
+    Статусы всех PEP из машиночитаемого индекса api/peps.json.
+    Документ хранится в HTTP-кеше сессии, а после истечения срока
+    перепроверяется условным запросом.
+    Возвращает словарь {номер PEP: статус}.
+    """
+    response = get_response(session, PEP_API_URL)
+    if response.status_code != HTTPStatus.OK:
+        raise FetchError(
+            f'Ошибка при загрузке {PEP_API_URL}: {response.status_code}'
+        )
+    try:
+        return {
+            int(number): pep['status']
+            for number, pep in response.json().items()
+        }
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise FetchError(f'Некорректный ответ {PEP_API_URL}: {e}') from e
+
+
+def extract_whats_new_from_html(html, version_link):
+    """
+    Извлекает заголовок и сведения об авторах из статьи What's New.
+    """
+    with measure('parse'):
+        soup = parse_html(html)
+    h1 = find_tag(soup, 'h1')
+    dl = find_tag(soup, 'dl')
+    return h1.text.strip(), dl.text.strip()
+
+
+HEADING_TAG = re.compile(r'^h[1-6]$')
+
+
+def _own_elements(section, elements):
+    """Элементы раздела без элементов вложенных разделов."""
+    return [
+        element for element in elements
+        if element.find_parent('section') is section
+    ]
+
+
+def extract_whats_new_sections(html, version_link):
+    """
+    Извлекает дерево разделов статьи What's New.
+    Для каждого раздела возвращает ссылку на раздел, уровень заголовка,
+    путь из заголовков родительских разделов, заголовок, упомянутые
+    в разделе PEP и модули. Упоминания во вложенных разделах
+    относятся к этим разделам.
+    """
+    with measure('parse'):
+        soup = parse_html(html)
+    find_tag(soup, 'h1')
+    paths = {}
+    records = []
+    for section in soup.find_all('section'):
+        heading = section.find(HEADING_TAG)
+        if heading is None:
+            continue
+        title = heading.text.replace('¶', '').strip()
+        parent = section.find_parent('section')
+        path = paths.get(id(parent), []) + [title]
+        paths[id(section)] = path
+        peps = dict.fromkeys(
+            a_tag.text.strip()
+            for a_tag in _own_elements(section, section.select('a.pep'))
+        )
+        modules = dict.fromkeys(
+            code.text.strip()
+            for code in _own_elements(section, section.select('code.py-mod'))
+        )
+        records.append((
+            f'{version_link}#{section.get("id", "")}',
+            int(heading.name[1]),
+            ' / '.join(path),
+            title,
+            ', '.join(peps),
+            ', '.join(modules),
+        ))
+    return tuple(records)
@@ -11,11 +11,13 @@ from requests_mock import Adapter
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
 SRC_DIR = BASE_DIR / 'src'
+CORPUS_DIR = BASE_DIR / 'tests' / 'fixture_data' / 'corpus'
 sys.path.append(str(BASE_DIR))
 sys.path.append(str(SRC_DIR))
 
 MAIN_DOC_URL = 'https://docs.python.org/3/'
 PEP_URL = 'https://www.python.org/dev/peps/'
+PEP_INDEX_URL = 'https://peps.python.org/'
 
 
 precode_files = ['constants.py', 'main.py', 'utils.py']
@@ -72,6 +74,27 @@ def mock_session(tempfile_session) -> CachedSession:
     yield mount_mock_adapter(tempfile_session)
 
 
+@pytest.fixture
+def corpus_session(tempfile_session) -> CachedSession:
+    """Сессия, получающая страницы из записанного корпуса."""
+    from bench.corpus import mount_corpus
+    tempfile_session.corpus_adapter = mount_corpus(tempfile_session)
+    yield tempfile_session
+
+
+@pytest.fixture
+def extraction_cache(tmp_path):
+    """Кеш извлечённых данных во временном файле."""
+    # Режимы парсера импортируют utils без префикса пакета.
+    import utils as loaded_utils
+    from storage import ExtractionCache
+    cache_path = tmp_path / 'extraction_cache.sqlite3'
+    with ExtractionCache(cache_path, max_entries=100) as cache:
+        loaded_utils.set_extraction_cache(cache)
+        yield cache
+    loaded_utils.set_extraction_cache(None)
+
+
 @pytest.fixture
 def response_page(mock_session):
     def _response_page(page):
@@ -0,0 +1,51 @@
+import pytest
+import requests
+try:
+    from src import main
+    # Режимы парсера импортируют модули без префикса пакета.
+    import archive
+    from exceptions import FetchError
+    from utils import get_response
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `archive.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `archive.py`'
+
+
+def run_modes(session):
+    return {
+        'latest-versions': list(main.latest_versions(session)),
+        'whats-new': list(main.whats_new(session)),
+        'pep': main.pep(session, workers=4),
+    }
+
+
+@pytest.fixture
+def recorded(corpus_session, tmp_path):
+    """Результаты режимов на корпусе и архив полученных ответов."""
+    path = tmp_path / 'responses.zip'
+    with archive.ResponseRecorder(path).attach(corpus_session):
+        results = run_modes(corpus_session)
+    return path, results
+
+
+def test_replay(recorded):
+    path, expected = recorded
+    session = requests.Session()
+    adapter = archive.mount_replay_adapter(session, path)
+    assert run_modes(session) == expected, (
+        'Режимы на архиве должны давать те же результаты, что и при записи'
+    )
+    assert 'GET https://peps.python.org/' in adapter.index
+    with pytest.raises(FetchError, match='нет в архиве'):
+        get_response(session, 'https://peps.python.org/pep-9999/')
+
+
+def test_record_keeps_status_and_headers(recorded):
+    path, _ = recorded
+    session = requests.Session()
+    archive.mount_replay_adapter(session, path)
+    response = session.get('https://peps.python.org/')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/html')
+    assert int(response.headers['Content-Length']) == len(response.content)
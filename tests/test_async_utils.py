@@ -0,0 +1,45 @@
+import asyncio
+
+import bs4
+import requests
+import requests_mock
+from conftest import MAIN_DOC_URL
+try:
+    from src import async_utils, main
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `async_utils.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `async_utils.py`'
+
+
+def test_fetch_many_async(mock_session):
+    urls = [MAIN_DOC_URL + f'page-{number}/' for number in range(5)]
+    with requests_mock.Mocker() as mock:
+        for number, url in enumerate(urls):
+            mock.get(url, text=f'<h1>Page {number}</h1>')
+        mock.get(MAIN_DOC_URL + 'broken/', exc=requests.ConnectionError)
+        got = asyncio.run(async_utils.fetch_many_async(
+            mock_session, urls + [MAIN_DOC_URL + 'broken/'], max_per_host=2
+        ))
+    assert all(isinstance(soup, bs4.BeautifulSoup) for soup in got[:-1])
+    assert [soup.h1.text for soup in got[:-1]] == [
+        f'Page {number}' for number in range(5)
+    ], 'Результаты должны возвращаться в порядке переданных ссылок'
+    assert isinstance(got[-1], Exception), (
+        'Ошибка загрузки одной страницы не должна прерывать остальные'
+    )
+
+
+def test_run_mode_async(mock_session):
+    html = (
+        '<div class="sphinxsidebarwrapper"><ul>All versions'
+        '<li><a href="https://docs.python.org/3.12/">'
+        'Python 3.12 (stable)</a></li></ul></div>'
+    )
+    with requests_mock.Mocker() as mock:
+        mock.get(MAIN_DOC_URL, text=html)
+        got = asyncio.run(
+            async_utils.run_mode_async(main.latest_versions, mock_session)
+        )
+    assert got[0] == ('Ссылка на документацию', 'Версия', 'Статус')
+    assert got[1][0] == 'https://docs.python.org/3.12/'
@@ -29,7 +29,7 @@ def test_configs_file():
     ),
     (
         argparse._StoreAction, ['-o', '--output'], 'output',
-        ('pretty', 'file'),
+        ('pretty', 'file', 'jsonl', 'sqlite', 'parquet', 'arrow'),
         'Дополнительные способы вывода данных'
     ),
 ])
@@ -64,3 +64,24 @@ def test_configure_argument_parser(
     assert got_action.help == help_str, (
         f'Укажите help-строку cli аргумента {got_action.dest}'
     )
+
+
+def test_configure_session():
+    args = configs.configure_argument_parser(['pep']).parse_args(
+        ['pep', '--cache-backend', 'memory', '--stale-while-revalidate']
+    )
+    session = configs.configure_session(args)
+    assert session.cache.__class__.__name__ == 'BaseCache', (
+        'Сессия должна использовать выбранное хранилище кеша'
+    )
+    assert session.settings.stale_while_revalidate is True
+    assert session.settings.expire_after == args.cache_expire
+    assert any(
+        pattern.startswith('peps.python.org')
+        for pattern in session.settings.urls_expire_after
+    ), 'Для страниц PEP должно быть задано время жизни в кеше'
+    adapter = session.get_adapter('https://peps.python.org/')
+    assert adapter.__class__.__name__ == 'ThrottledAdapter', (
+        'Все режимы должны использовать транспорт с ограничением запросов'
+    )
+    assert (adapter.rate, adapter.retries) == (args.rate, args.retries)
@@ -0,0 +1,134 @@
+import io
+import os
+import re
+import zipfile
+
+import pytest
+import requests
+import requests_mock
+try:
+    from src import downloader
+    from src.progress import SilentReporter, UNIT_BYTES
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloader.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloader.py`'
+
+ARCHIVE_URL = 'https://docs.python.org/3/archives/python-docs-pdf-a4.zip'
+
+
+@pytest.fixture(scope='module')
+def archive_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        archive.writestr('docs/library.pdf', os.urandom(3 * 1024 * 1024))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def task():
+    return SilentReporter().task('Загрузка архива', unit=UNIT_BYTES)
+
+
+def register_archive(mock, data, broken_ranges=()):
+    def serve_range(request, context):
+        start, end = map(int, re.match(
+            r'bytes=(\d+)-(\d+)', request.headers['Range']
+        ).groups())
+        if start in broken_ranges:
+            raise requests.ConnectionError('Обрыв соединения')
+        context.status_code = 206
+        return data[start:end + 1]
+
+    mock.head(ARCHIVE_URL, headers={
+        'Content-Length': str(len(data)), 'Accept-Ranges': 'bytes',
+    })
+    mock.get(ARCHIVE_URL, content=serve_range)
+
+
+def test_download_file_segments(tmp_path, mock_session, archive_bytes,
+                                task):
+    path = tmp_path / 'docs.zip'
+    with requests_mock.Mocker() as mock:
+        register_archive(mock, archive_bytes)
+        downloader.download_file(
+            mock_session, ARCHIVE_URL, path, task, workers=3
+        )
+        ranges = [
+            request.headers['Range'] for request in mock.request_history
+            if request.method == 'GET'
+        ]
+    assert path.read_bytes() == archive_bytes
+    assert len(ranges) == 3, 'Архив должен загружаться сегментами'
+    assert not (tmp_path / 'docs.zip.part').exists()
+    assert not (tmp_path / 'docs.zip.part.json').exists()
+    assert not mock_session.cache.responses, (
+        'Архив не должен сохраняться в HTTP-кеш'
+    )
+
+
+def test_download_file_resume(tmp_path, mock_session, archive_bytes, task):
+    path = tmp_path / 'docs.zip'
+    with requests_mock.Mocker() as mock:
+        register_archive(mock, archive_bytes, broken_ranges=(0,))
+        with pytest.raises(downloader.DownloadError):
+            downloader.download_file(
+                mock_session, ARCHIVE_URL, path, task,
+                workers=3,
+            )
+    assert (tmp_path / 'docs.zip.part').exists(), (
+        'После обрыва должен оставаться .part-файл для докачки'
+    )
+
+    with requests_mock.Mocker() as mock:
+        register_archive(mock, archive_bytes)
+        downloader.download_file(
+            mock_session, ARCHIVE_URL, path, task, workers=3
+        )
+        ranges = [
+            request.headers['Range'] for request in mock.request_history
+            if request.method == 'GET'
+        ]
+    assert path.read_bytes() == archive_bytes
+    assert len(ranges) == 1 and ranges[0].startswith('bytes=0-'), (
+        'При докачке должны запрашиваться только незагруженные сегменты'
+    )
+    assert task.done == task.total == len(archive_bytes)
+    assert task.initial > 0, (
+        'Загруженное до докачки не должно учитываться в скорости'
+    )
+
+
+def test_download_file_corrupt(tmp_path, mock_session, archive_bytes,
+                               task):
+    path = tmp_path / 'docs.zip'
+    middle = len(archive_bytes) // 2
+    corrupt = (
+        archive_bytes[:middle]
+        + bytes([archive_bytes[middle] ^ 0xFF])
+        + archive_bytes[middle + 1:]
+    )
+    with requests_mock.Mocker() as mock:
+        register_archive(mock, corrupt)
+        with pytest.raises(downloader.DownloadError):
+            downloader.download_file(
+                mock_session, ARCHIVE_URL, path, task, workers=3
+            )
+    assert not (tmp_path / 'docs.zip.part').exists()
+    assert not (tmp_path / 'docs.zip.part.json').exists(), (
+        'Состояние повреждённой загрузки не должно сохраняться'
+    )
+
+    with requests_mock.Mocker() as mock:
+        register_archive(mock, archive_bytes)
+        downloader.download_file(
+            mock_session, ARCHIVE_URL, path, task, workers=3
+        )
+    assert path.read_bytes() == archive_bytes
+
+
+def test_verify_download_size(tmp_path):
+    path = tmp_path / 'docs.zip.part'
+    path.write_bytes(b'1234')
+    with pytest.raises(downloader.DownloadError):
+        downloader.verify_download(path, 10)
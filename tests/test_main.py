@@ -1,5 +1,7 @@
 import pytest
+import requests_mock
 from pathlib import Path
+from conftest import MAIN_DOC_URL, PEP_INDEX_URL
 try:
     from src import main
 except ModuleNotFoundError:
@@ -31,11 +33,8 @@ def test_main_file():
 
 
 def test_whats_new(mock_session):
-    got = main.whats_new(mock_session)
+    got = list(main.whats_new(mock_session))
     header = ('Ссылка на статью', 'Заголовок', 'Редактор, автор')
-    assert isinstance(got, list), (
-        'Функция `whats_new` должна возвращать объект типа `list`'
-    )
     assert len(got) > 0, (
         'Убедитесь что функция `whats_new` модуля `main.py` '
         'возвращает непустой список'
@@ -53,10 +52,7 @@ def test_whats_new(mock_session):
 
 @pytest.mark.skip()
 def test_latest_versions(mock_session):
-    got = main.latest_versions(mock_session)
-    assert isinstance(got, list), (
-        'Функция `latest_versions` должна возвращать объект типа `list`'
-    )
+    got = list(main.latest_versions(mock_session))
     assert isinstance(got[0], tuple), (
         'Функция `latest_versions` должна вернуть список `result`, '
         'элементами которого должны быть объекты типа `tuple`'
@@ -123,7 +119,10 @@ def test_mode_to_function():
             f'{name_func} - это строка.'
         )
         assert (
-            name_func in ['whats-new', 'latest-versions', 'download', 'pep']
+            name_func in [
+                'whats-new', 'whats-new-full', 'latest-versions',
+                'download', 'pep', 'pep-diff', 'serve',
+            ]
         ), (
             'В модуле `main.py` в объекте `MODE_TO_FUNCTION` '
             f'нет ключа `{name_func}`'
@@ -134,9 +133,283 @@ def test_mode_to_function():
         )
         assert (
             func.__name__ in [
-                'whats_new', 'latest_versions', 'download', 'pep'
+                'whats_new', 'whats_new_full', 'latest_versions',
+                'download', 'pep', 'pep_diff', 'serve'
             ]
         ), (
             'В модуле `main.py` в объекте `MODE_TO_FUNCTION` '
             f'нет значения {func}'
         )
+
+
+PEP_INDEX_HTML = '''
+<h3>Finished</h3>
+<table><tbody>
+<tr><td>SF</td><td><a href="pep-0001/">1</a></td></tr>
+<tr><td>IA</td><td><a href="pep-0002/">2</a></td></tr>
+</tbody></table>
+<h2>Numerical Index</h2>
+<table><tbody>
+<tr><td>SF</td><td><a href="pep-0001/">1</a></td></tr>
+<tr><td>SF</td><td><a href="pep-0003/">3</a></td></tr>
+</tbody></table>
+'''
+
+
+def pep_page_html(status):
+    return f'<dl><dt>Status:</dt><dd>{status}</dd></dl>'
+
+
+@pytest.mark.parametrize('workers, processes', [(1, 0), (4, 0), (4, 2)])
+def test_pep_workers(mock_session, workers, processes):
+    with requests_mock.Mocker() as mock:
+        mock.get(PEP_INDEX_URL, text=PEP_INDEX_HTML)
+        mock.get(PEP_INDEX_URL + 'pep-0001/', text=pep_page_html('Final'))
+        mock.get(PEP_INDEX_URL + 'pep-0002/', text=pep_page_html('Active'))
+        mock.get(PEP_INDEX_URL + 'pep-0003/', text=pep_page_html('Final'))
+        got = main.pep(
+            mock_session, workers=workers, processes=processes
+        )
+        pep_requests = [
+            request.url for request in mock.request_history
+            if request.url != PEP_INDEX_URL
+        ]
+    assert sorted(pep_requests) == [
+        PEP_INDEX_URL + f'pep-000{number}/' for number in (1, 2, 3)
+    ], 'Страница PEP из нескольких таблиц должна загружаться один раз'
+    assert got == [
+        ('Статус', 'Количество'),
+        ('Final', 2),
+        ('Active', 1),
+        ('Total', 3),
+    ], (
+        'Функция `pep` должна возвращать одинаковый результат '
+        'при любом числе потоков'
+    )
+
+
+def run_pep_diff(session, index_html, pages, snapshot, warm_pages=False):
+    if warm_pages:
+        session.cache.delete(urls=[PEP_INDEX_URL])
+    else:
+        session.cache.clear()
+    with requests_mock.Mocker() as mock:
+        mock.get(PEP_INDEX_URL, text=index_html)
+        for number, status in pages.items():
+            mock.get(
+                PEP_INDEX_URL + f'pep-000{number}/',
+                text=pep_page_html(status),
+            )
+        got = main.pep_diff(session, workers=2, snapshot=snapshot)
+        fetched = sorted(
+            request.url for request in mock.request_history
+            if request.url != PEP_INDEX_URL
+        )
+    return got, fetched
+
+
+def test_pep_diff(mock_session, tmp_path):
+    snapshot = tmp_path / 'snapshot.sqlite3'
+    pages = {1: 'Final', 2: 'Active', 3: 'Final', 4: 'Draft'}
+    got, fetched = run_pep_diff(mock_session, PEP_INDEX_HTML, pages, snapshot)
+    assert got[1:] == [
+        (PEP_INDEX_URL + f'pep-000{number}/', '', status)
+        for number, status in ((1, 'Final'), (2, 'Active'), (3, 'Final'))
+    ], 'При первом запуске все PEP новые'
+    assert len(fetched) == 3
+
+    index_html = PEP_INDEX_HTML.replace(
+        '<td>IA</td>', '<td>SR</td>'
+    ).replace(
+        '<tr><td>SF</td><td><a href="pep-0003/">3</a></td></tr>',
+        '<tr><td>I</td><td><a href="pep-0004/">4</a></td></tr>',
+    )
+    pages[2] = 'Rejected'
+    got, fetched = run_pep_diff(mock_session, index_html, pages, snapshot)
+    assert got == [
+        ('Ссылка на PEP', 'Было', 'Стало'),
+        (PEP_INDEX_URL + 'pep-0002/', 'Active', 'Rejected'),
+        (PEP_INDEX_URL + 'pep-0004/', '', 'Draft'),
+        (PEP_INDEX_URL + 'pep-0003/', 'Final', ''),
+    ]
+    assert fetched == [
+        PEP_INDEX_URL + 'pep-0002/', PEP_INDEX_URL + 'pep-0004/'
+    ], (
+        'Страницы должны загружаться только для новых PEP и PEP '
+        'с изменённым статусом в таблице'
+    )
+
+    got, fetched = run_pep_diff(mock_session, index_html, pages, snapshot)
+    assert got == [('Ссылка на PEP', 'Было', 'Стало')] and not fetched
+
+
+def test_pep_diff_bypasses_page_cache(mock_session, tmp_path):
+    snapshot = tmp_path / 'snapshot.sqlite3'
+    pages = {1: 'Final', 2: 'Active', 3: 'Final'}
+    run_pep_diff(mock_session, PEP_INDEX_HTML, pages, snapshot)
+
+    index_html = PEP_INDEX_HTML.replace('<td>IA</td>', '<td>SR</td>')
+    pages[2] = 'Rejected'
+    got, fetched = run_pep_diff(
+        mock_session, index_html, pages, snapshot, warm_pages=True
+    )
+    assert got == [
+        ('Ссылка на PEP', 'Было', 'Стало'),
+        (PEP_INDEX_URL + 'pep-0002/', 'Active', 'Rejected'),
+    ], 'Устаревшая страница из HTTP-кеша не должна скрывать переход'
+    assert fetched == [PEP_INDEX_URL + 'pep-0002/']
+
+
+def test_maintain_caches(mock_session, extraction_cache, tmp_path):
+    import sqlite3
+
+    for number in range(5):
+        mock_session.get(f'mock://pages/{number}')
+    extraction_cache.save('extractor:v1', 'page', 'Final')
+    main.maintain_caches(mock_session, cache_max_entries=2)
+    assert len(mock_session.cache.responses) == 2
+    connection = sqlite3.connect(str(tmp_path / 'extraction_cache.sqlite3'))
+    try:
+        saved = connection.execute(
+            'SELECT COUNT(*) FROM extractions'
+        ).fetchone()[0]
+    finally:
+        connection.close()
+    assert saved == 1, (
+        'Кеш извлечённых данных должен сохраняться без остановки сервера'
+    )
+
+
+PEP_API_URL = PEP_INDEX_URL + 'api/peps.json'
+
+
+@pytest.mark.parametrize('api_response', [
+    {'json': {
+        '1': {'number': 1, 'status': 'Final'},
+        '2': {'number': 2, 'status': 'Draft'},
+    }},
+    {'status_code': 500, 'text': 'Server error'},
+    {'text': 'not json'},
+])
+def test_pep_api_source(mock_session, api_response):
+    with requests_mock.Mocker() as mock:
+        mock.get(PEP_INDEX_URL, text=PEP_INDEX_HTML)
+        mock.get(PEP_API_URL, **api_response)
+        mock.get(PEP_INDEX_URL + 'pep-0001/', text=pep_page_html('Final'))
+        mock.get(PEP_INDEX_URL + 'pep-0002/', text=pep_page_html('Active'))
+        mock.get(PEP_INDEX_URL + 'pep-0003/', text=pep_page_html('Final'))
+        got = main.pep(mock_session, workers=2, pep_source='api')
+        pep_requests = sorted(
+            request.url for request in mock.request_history
+            if request.url not in (PEP_INDEX_URL, PEP_API_URL)
+        )
+    assert got == [
+        ('Статус', 'Количество'),
+        ('Final', 2),
+        ('Active', 1),
+        ('Total', 3),
+    ], 'Источник api должен давать тот же результат, что и страницы PEP'
+    expected = [PEP_INDEX_URL + 'pep-0002/', PEP_INDEX_URL + 'pep-0003/']
+    if 'json' not in api_response:
+        expected.insert(0, PEP_INDEX_URL + 'pep-0001/')
+    assert pep_requests == expected, (
+        'Со страниц PEP должны загружаться только PEP, которых нет в API '
+        'или чей статус в API расходится с таблицей'
+    )
+
+
+WHATS_NEW_HTML = '''
+<section id="what-s-new-in-python"><div class="toctree-wrapper"><ul>
+<li class="toctree-l1"><a href="3.11.html">3.11</a></li>
+<li class="toctree-l1"><a href="3.10.html">3.10</a></li>
+</ul></div></section>
+'''
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_whats_new_processes(mock_session, processes):
+    whats_new_url = MAIN_DOC_URL + 'whatsnew/'
+    with requests_mock.Mocker() as mock:
+        mock.get(whats_new_url, text=WHATS_NEW_HTML)
+        for version in ('3.11', '3.10'):
+            mock.get(
+                whats_new_url + f'{version}.html',
+                text=f'<h1>Python {version}</h1><dl>Editor {version}</dl>',
+            )
+        got = list(
+            main.whats_new(mock_session, workers=2, processes=processes)
+        )
+    assert got[1:] == [
+        (whats_new_url + '3.11.html', 'Python 3.11', 'Editor 3.11'),
+        (whats_new_url + '3.10.html', 'Python 3.10', 'Editor 3.10'),
+    ], 'Разбор в пуле процессов должен давать тот же результат'
+
+
+def test_modes_on_corpus(corpus_session, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'BASE_DIR', Path(tmp_path))
+    versions = list(main.latest_versions(corpus_session))
+    assert versions[1][0] == 'https://docs.python.org/3.14/'
+    assert 'in development' in versions[1][2]
+    whats_new = list(main.whats_new(corpus_session))
+    assert [row[1] for row in whats_new[1:]] == [
+        f'What’s New In Python {version}¶'
+        for version in ('3.12', '3.11', '3.10', '3.9')
+    ]
+    assert main.pep(corpus_session, parser_engine='lxml')[-1] == ('Total', 10)
+    requests_before = corpus_session.corpus_adapter.requests
+    assert main.pep(corpus_session, pep_source='api')[-1] == ('Total', 10)
+    assert corpus_session.corpus_adapter.requests == requests_before + 1, (
+        'При согласованных статусах нужен только запрос к api/peps.json'
+    )
+    main.download(corpus_session)
+    assert (
+        tmp_path / 'downloads' / 'python-3.12.4-docs-pdf-a4.zip'
+    ).exists(), 'Архив из корпуса должен загружаться'
+
+
+def test_whats_new_full(corpus_session, extraction_cache):
+    rows = list(main.whats_new_full(corpus_session, workers=4))
+    assert rows[0][0] == 'Ссылка на раздел'
+    typing_sections = [row for row in rows[1:] if row[3] == 'typing']
+    assert len(typing_sections) == 3, (
+        'Разделы должны извлекаться из всех статей What\'s New'
+    )
+    assert typing_sections[0] == (
+        'https://docs.python.org/3/whatsnew/3.12.html#typing',
+        3,
+        'What’s New In Python 3.12 / Improved Modules / typing',
+        'typing',
+        '',
+        'typing',
+    )
+    assert any(row[4] == 'PEP 695' for row in rows[1:])
+
+    assert not extraction_cache.used
+    assert list(main.whats_new_full(corpus_session, workers=4)) == rows
+    assert len(extraction_cache.used) == 4, (
+        'Повторный запуск должен брать разделы из кеша извлечённых данных'
+    )
+
+
+def test_run_batch(corpus_session, monkeypatch, tmp_path):
+    # Режимы парсера импортируют модули без префикса пакета.
+    import metrics
+    import outputs
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    corpus_session.corpus_adapter.latency = 0.02
+    args = main.configure_argument_parser(main.MODE_TO_FUNCTION).parse_args(
+        ['whats-new', 'whats-new-full', 'whats-new', '-o', 'file']
+    )
+    args.mode = list(dict.fromkeys(args.mode))
+    collector = metrics.enable_metrics()
+    try:
+        main.run_batch(corpus_session, args)
+    finally:
+        metrics.disable_metrics()
+    files = sorted(path.name for path in (tmp_path / 'results').iterdir())
+    assert len(files) == 2, 'Результаты каждого режима выводятся отдельно'
+    assert files[0].startswith('whats-new-full_')
+    assert files[1].startswith('whats-new_')
+    assert collector.summary()['counters'].get('deduplicated_requests'), (
+        'Общие страницы режимов должны загружаться один раз'
+    )
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+try:
+    from src import main
+    # Модули src импортируют друг друга без префикса пакета,
+    # поэтому включать метрики нужно в том же модуле.
+    import metrics
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `metrics.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `metrics.py`'
+
+
+@pytest.fixture
+def collector():
+    yield metrics.enable_metrics()
+    metrics.disable_metrics()
+
+
+def test_instrumented_disabled():
+    calls = []
+
+    @metrics.instrumented('phase')
+    def func(value):
+        calls.append(value)
+        return value * 2
+
+    assert metrics.get_metrics() is None
+    assert func(2) == 4
+    with metrics.measure('phase'):
+        pass
+    metrics.count('events')
+    assert calls == [2]
+
+
+def test_metrics_export(collector, tmp_path):
+    collector.observe('parse', 0.5)
+    collector.observe('parse', 1.5)
+    collector.increment('cache_hits', 3)
+    summary = collector.summary()
+    assert summary['phases']['parse'] == {
+        'count': 2, 'total_seconds': 2.0, 'max_seconds': 1.5,
+    }
+    assert summary['counters'] == {'cache_hits': 3}
+
+    collector.export(tmp_path / 'metrics.json')
+    assert json.loads((tmp_path / 'metrics.json').read_text()) == summary
+    collector.export(tmp_path / 'metrics.prom')
+    prometheus = (tmp_path / 'metrics.prom').read_text()
+    assert 'pep_parser_phase_seconds_count{phase="parse"} 2' in prometheus
+    assert 'pep_parser_cache_hits_total 3' in prometheus
+
+
+def test_pep_metrics(collector, corpus_session):
+    main.pep(corpus_session, workers=4)
+    summary = collector.summary()
+    requests = corpus_session.corpus_adapter.requests
+    assert summary['counters']['cache_misses'] == requests, (
+        'Каждый запрос к серверу должен учитываться как промах кеша'
+    )
+    assert summary['counters']['bytes_received'] > 0
+    for phase in ('server', 'transfer', 'parse', 'select', 'extract_status'):
+        assert phase in summary['phases'], f'Нет замеров фазы {phase}'
+
+    hits = summary['counters'].get('cache_hits', 0)
+    main.pep(corpus_session, workers=4)
+    counters = collector.summary()['counters']
+    assert counters['cache_misses'] == requests, (
+        'Повторный запуск должен брать страницы из кеша'
+    )
+    assert counters['cache_hits'] > hits
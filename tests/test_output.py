@@ -1,3 +1,5 @@
+import json
+import sqlite3
 from datetime import datetime
 from typing import Optional
 from pathlib import Path
@@ -90,3 +92,75 @@ def test_output_file():
     assert hasattr(outputs, 'file_output'), (
         'Напишите функцию `file_output` в модуле `output.py`'
     )
+
+
+def test_file_output_streams_rows(monkeypatch, tmp_path):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    written = []
+
+    def rows():
+        yield ('Ссылка', 'Версия')
+        yield ('https://docs.python.org/3.12/', '3.12')
+        [csv_file] = (tmp_path / 'results').glob('*.csv')
+        written.append(csv_file.read_text(encoding='utf-8'))
+        yield ('https://docs.python.org/3.11/', '3.11')
+
+    outputs.control_output(rows(), cli_args('latest-versions', 'file'))
+    assert '3.12' in written[0], (
+        'Строки должны записываться в файл по мере получения'
+    )
+
+
+def test_pretty_output_accepts_generator(capsys, records):
+    outputs.control_output(
+        iter(records('pep')), cli_args('pep', 'pretty')
+    )
+    captured_out, _ = capsys.readouterr()
+    assert 'Active' in captured_out
+
+
+def test_jsonl_output(monkeypatch, tmp_path, records):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    outputs.control_output(records('pep'), cli_args('pep', 'jsonl'))
+    [jsonl_file] = (tmp_path / 'results').glob('pep_*.jsonl')
+    lines = [
+        json.loads(line)
+        for line in jsonl_file.read_text(encoding='utf-8').splitlines()
+    ]
+    assert lines[0] == {'status': 'Active', 'count': 36}, (
+        'Строки JSON Lines должны содержать типизированные колонки '
+        'без строки заголовка'
+    )
+    assert lines[-1] == {'status': 'Total', 'count': 574}
+
+
+def test_sqlite_output_appends(monkeypatch, tmp_path, records):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    for _ in range(2):
+        outputs.control_output(
+            records('latest-versions'),
+            cli_args('latest-versions', 'sqlite'),
+        )
+    connection = sqlite3.connect(tmp_path / 'results' / 'results.sqlite3')
+    rows = connection.execute(
+        'SELECT url, version, status FROM latest_versions'
+    ).fetchall()
+    connection.close()
+    assert rows == [
+        ('https://docs.python.org/3.11/', '3.11', 'in development')
+    ] * 2, 'Результаты каждого запуска должны добавляться в таблицу режима'
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_columnar_output(monkeypatch, tmp_path, records, output_format):
+    pyarrow = pytest.importorskip('pyarrow')
+    from pyarrow import ipc, parquet
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    outputs.control_output(records('pep'), cli_args('pep', output_format))
+    [path] = (tmp_path / 'results').glob(f'pep_*.{output_format}')
+    if output_format == 'parquet':
+        table = parquet.read_table(path)
+    else:
+        table = ipc.open_file(path).read_all()
+    assert table.schema.field('count').type == pyarrow.int64()
+    assert table.column('status').to_pylist()[-1] == 'Total'
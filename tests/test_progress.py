@@ -0,0 +1,66 @@
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from src import progress
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `progress.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `progress.py`'
+
+
+def json_events(interval):
+    stream = io.StringIO()
+    reporter = progress.JsonReporter(interval=interval, stream=stream)
+
+    def events():
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    return reporter, events
+
+
+def test_updates_rate_limited():
+    reporter, events = json_events(interval=60)
+    with reporter.task('Загрузка', total=4000) as task:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(4000):
+                executor.submit(task.update)
+    got = events()
+    assert [event['event'] for event in got] == ['start', 'finish'], (
+        'Частые обновления не должны выводиться чаще интервала'
+    )
+    assert got[-1]['done'] == 4000, (
+        'Обновления из разных потоков не должны теряться'
+    )
+
+
+def test_throughput():
+    reporter, events = json_events(interval=0)
+    task = reporter.task('Страницы', total=10)
+    for _ in range(5):
+        reporter.receive(1024)
+        task.update()
+    time.sleep(0.05)
+    task.close()
+    task.close()
+    got = events()
+    assert [event['event'] for event in got] == (
+        ['start'] + ['progress'] * 5 + ['finish']
+    )
+    finish = got[-1]
+    assert 0 < finish['rate'] <= 5 / 0.05
+    assert 0 < finish['bytes_per_second'] <= 5 * 1024 / 0.05
+    assert finish['eta'] is not None and finish['eta'] > 0
+
+
+def test_track_closes_task(monkeypatch):
+    reporter, events = json_events(interval=60)
+    monkeypatch.setattr(progress, '_reporter', reporter)
+    items = progress.track(range(10), 'Строки', total=10)
+    assert next(items) == 0
+    items.close()
+    got = events()
+    assert got[-1]['event'] == 'finish'
+    assert got[-1]['done'] == 0
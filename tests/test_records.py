@@ -0,0 +1,72 @@
+import json
+import sqlite3
+import sys
+from typing import get_type_hints
+
+import pytest
+try:
+    from src import records
+    from src.constants import EXPECTED_STATUS, RESULT_COLUMNS
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `records.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `records.py`'
+
+
+@pytest.mark.parametrize('mode, record_type', [
+    ('latest-versions', records.VersionRecord),
+    ('whats-new', records.WhatsNewRecord),
+    ('whats-new-full', records.WhatsNewSectionRecord),
+    ('pep', records.StatusCount),
+    ('pep-diff', records.StatusChange),
+])
+def test_records_match_result_columns(mode, record_type):
+    hints = get_type_hints(record_type)
+    assert [
+        hints[field] for field in record_type._fields
+    ] == [column_type for _, column_type in RESULT_COLUMNS[mode]], (
+        f'Поля записи {record_type.__name__} должны соответствовать '
+        f'колонкам режима {mode}'
+    )
+    assert not hasattr(record_type(*range(len(hints))), '__dict__'), (
+        'Записи не должны хранить словарь атрибутов'
+    )
+
+
+def test_pep_status():
+    statuses = {
+        status for values in EXPECTED_STATUS.values() for status in values
+    }
+    assert {status.value for status in records.PepStatus} == statuses
+    final = records.pep_status('Final')
+    assert final is records.PepStatus.FINAL
+    assert final == 'Final' and str(final) == f'{final}' == 'Final'
+    assert json.dumps(final) == '"Final"'
+    with sqlite3.connect(':memory:') as connection:
+        assert connection.execute(
+            'SELECT ?', (final,)
+        ).fetchone() == ('Final',)
+
+    unknown = records.pep_status(''.join(['April ', 'Fool!']))
+    assert unknown == 'April Fool!'
+    assert unknown is sys.intern('April Fool!'), (
+        'Неизвестные статусы должны интернироваться'
+    )
+
+
+def test_mismatch_record():
+    mismatch = records.MismatchRecord(
+        'https://peps.python.org/pep-0001/',
+        records.PepStatus.FINAL,
+        records.EXPECTED_PEP_STATUS['A'],
+    )
+    assert str(mismatch) == (
+        'Несовпадающие статусы:\n'
+        'https://peps.python.org/pep-0001/\n'
+        'Статус в карточке: Final\n'
+        'Ожидаемые статусы: Active, Accepted'
+    )
+    record = records.PepRecord(
+        1, mismatch.link, mismatch.expected, records.PepStatus.ACTIVE
+    )
+    assert record.matches_table
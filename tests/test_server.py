@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+import requests
+try:
+    from src import server
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `server.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `server.py`'
+
+
+@pytest.fixture
+def results():
+    calls = []
+
+    def pep():
+        calls.append('pep')
+        return [('Статус', 'Количество'), ('Final', 2), ('Total', 2)]
+
+    cache = server.ResultCache({
+        'pep': pep,
+        'latest-versions': lambda: [('Ссылка', 'Версия', 'Статус')],
+    })
+    cache.calls = calls
+    return cache
+
+
+@pytest.fixture
+def base_url(results):
+    http_server = server.create_server(results, '127.0.0.1', 0)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{http_server.server_port}/'
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def test_serve_results(results, base_url):
+    response = requests.get(base_url + 'pep')
+    assert response.status_code == 503, (
+        'До первого обновления сервер должен отвечать 503'
+    )
+    results.refresh_all()
+    response = requests.get(base_url + 'pep')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['mode'] == 'pep'
+    assert data['results'] == [
+        {'status': 'Final', 'count': 2},
+        {'status': 'Total', 'count': 2},
+    ]
+    cached = requests.get(
+        base_url + 'pep', headers={'If-None-Match': response.headers['ETag']}
+    )
+    assert cached.status_code == 304
+    requests.get(base_url + 'pep')
+    assert results.calls == ['pep'], (
+        'Запросы должны обслуживаться из памяти без запуска парсера'
+    )
+    assert requests.get(base_url + 'latest-versions').json()['results'] == []
+    assert requests.get(base_url + 'download').status_code == 404
+
+
+def test_refresh_periodically(results):
+    stop = threading.Event()
+    stop.set()
+    server.refresh_periodically(results, 60, stop)
+    assert results.get('pep') is not None
+
+
+def test_refresh_all_after_refresh():
+    calls = []
+
+    def broken():
+        raise RuntimeError('Ошибка режима')
+
+    cache = server.ResultCache(
+        {'pep': broken}, after_refresh=lambda: calls.append('after')
+    )
+    cache.refresh_all()
+    cache.refresh_all()
+    assert calls == ['after', 'after'], (
+        'after_refresh должна вызываться после каждого обновления'
+    )
@@ -0,0 +1,56 @@
+import subprocess
+import sys
+
+from conftest import BASE_DIR, SRC_DIR
+
+# Бюджет времени импорта main.py, мс (с запасом для медленных машин).
+STARTUP_BUDGET_MS = 200
+HEAVY_MODULES = (
+    'bs4', 'lxml', 'requests', 'requests_cache', 'tqdm', 'prettytable',
+)
+
+
+def import_times(code):
+    """Суммарное время импорта модулей в мкс по выводу -X importtime."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_help_imports():
+    times = import_times(
+        'import main; '
+        'main.configure_argument_parser(main.MODE_TO_FUNCTION).format_help()'
+    )
+    loaded = [module for module in HEAVY_MODULES if module in times]
+    assert not loaded, (
+        f'Для вывода справки не нужны тяжёлые зависимости: {loaded}'
+    )
+    assert times['main'] / 1000 < STARTUP_BUDGET_MS, (
+        f'Импорт main.py занимает {times["main"] / 1000:.0f} мс, '
+        f'бюджет {STARTUP_BUDGET_MS} мс'
+    )
+
+
+def test_latest_versions_imports():
+    code = (
+        f'import sys; sys.path.insert(0, {str(BASE_DIR)!r}); '
+        'import requests; from bench.corpus import mount_corpus; '
+        'import main, outputs; '
+        'session = requests.Session(); mount_corpus(session); '
+        'outputs.default_output(main.latest_versions(session))'
+    )
+    times = import_times(code)
+    assert 'bs4' in times
+    assert 'tqdm' not in times and 'prettytable' not in times, (
+        'Режиму latest-versions с выводом в консоль не нужны tqdm '
+        'и prettytable'
+    )
@@ -0,0 +1,160 @@
+import requests_mock
+from conftest import PEP_INDEX_URL
+try:
+    from src import main, storage
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `storage.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `storage.py`'
+
+PEP_INDEX_HTML = '''
+<table><tbody>
+<tr><td>SF</td><td><a href="pep-0001/">1</a></td></tr>
+<tr><td>IA</td><td><a href="pep-0002/">2</a></td></tr>
+</tbody></table>
+'''
+
+
+def register_pep_pages(mock, not_modified=False):
+    mock.get(PEP_INDEX_URL, text=PEP_INDEX_HTML)
+    for number, status in ((1, 'Final'), (2, 'Active')):
+        mock.get(
+            PEP_INDEX_URL + f'pep-000{number}/',
+            [{'status_code': 304, 'text': ''}] if not_modified else [{
+                'text': f'<dl><dt>Status</dt><dd>{status}</dd></dl>',
+                'headers': {'ETag': f'"pep-{number}"'},
+            }],
+        )
+
+
+def test_pep_store_roundtrip(tmp_path):
+    record = {
+        'url': PEP_INDEX_URL + 'pep-0001/',
+        'table_status': 'Final',
+        'page_status': 'Final',
+        'etag': '"1"',
+        'last_modified': None,
+        'content_hash': 'abc',
+    }
+    with storage.PepStore(tmp_path / 'store.sqlite3') as store:
+        store.save(record)
+    with storage.PepStore(tmp_path / 'store.sqlite3') as store:
+        assert store.get(record['url']) == record
+        assert store.prune([]) == {record['url']}
+        assert store.get(record['url']) is None
+
+
+def test_extraction_cache(tmp_path):
+    cache_path = tmp_path / 'cache.sqlite3'
+    with storage.ExtractionCache(cache_path, max_entries=2) as cache:
+        assert cache.get('extractor:v1', 'page') is None
+        cache.save('extractor:v1', 'page', [('Final', 1)])
+        cache.save('extractor:v1', 'other', 'Active')
+    with storage.ExtractionCache(cache_path, max_entries=2) as cache:
+        assert cache.get('extractor:v1', 'page') == (('Final', 1),), (
+            'Результат из кеша должен совпадать с результатом парсера'
+        )
+        assert cache.get('extractor:v2', 'page') is None, (
+            'После изменения кода парсера результат должен устаревать'
+        )
+        cache.save('extractor:v1', 'new', 'Draft')
+    with storage.ExtractionCache(cache_path, max_entries=2) as cache:
+        assert cache.get('extractor:v1', 'other') is None, (
+            'Давно не использованные записи сверх размера кеша удаляются'
+        )
+        assert cache.get('extractor:v1', 'page') is not None
+        assert cache.get('extractor:v1', 'new') == 'Draft'
+
+
+def test_extraction_cache_shared(tmp_path, monkeypatch):
+    import sqlite3
+
+    monkeypatch.setattr(storage, 'BUSY_TIMEOUT', 0.1)
+    cache_path = tmp_path / 'cache.sqlite3'
+    with storage.ExtractionCache(cache_path, max_entries=10) as first, \
+            storage.ExtractionCache(cache_path, max_entries=10) as second:
+        first.save('extractor:v1', 'page', ['Final'])
+        assert second.get('extractor:v1', 'page') == ('Final',), (
+            'Результат должен сохраняться сразу, а не при закрытии кеша'
+        )
+        other = sqlite3.connect(str(cache_path), isolation_level=None)
+        other.execute('BEGIN IMMEDIATE')
+        try:
+            assert second.save('extractor:v1', 'other', ['Draft']) == (
+                'Draft',
+            ), 'Занятая база не должна мешать возврату результата'
+            assert second.get('extractor:v1', 'page') == ('Final',)
+            assert second.flush() == 0
+        finally:
+            other.rollback()
+            other.close()
+        assert second.get('extractor:v1', 'other') is None
+        assert first.save('extractor:v1', 'record', {1}) == {1}, (
+            'Результат, который нельзя сохранить в JSON, не теряется'
+        )
+
+
+def test_pep_incremental(mock_session, tmp_path):
+    store_path = tmp_path / 'store.sqlite3'
+    with requests_mock.Mocker() as mock:
+        register_pep_pages(mock)
+        first = main.pep(mock_session, incremental=store_path)
+
+    with requests_mock.Mocker() as mock:
+        register_pep_pages(mock, not_modified=True)
+        second = main.pep(mock_session, incremental=store_path)
+        conditional = [
+            request.headers.get('If-None-Match')
+            for request in mock.request_history
+            if request.url != PEP_INDEX_URL
+        ]
+
+    assert first == second == [
+        ('Статус', 'Количество'),
+        ('Final', 1),
+        ('Active', 1),
+        ('Total', 2),
+    ], 'Неизменённые PEP должны браться из хранилища'
+    assert sorted(conditional) == ['"pep-1"', '"pep-2"'], (
+        'Повторный запуск должен отправлять условные запросы с ETag'
+    )
+
+
+def test_pep_incremental_shared_store(mock_session, tmp_path, monkeypatch):
+    import sqlite3
+    # Режим pep импортирует storage без префикса пакета.
+    import storage as loaded_storage
+
+    monkeypatch.setattr(loaded_storage, 'BUSY_TIMEOUT', 0.1)
+    expected = [
+        ('Статус', 'Количество'),
+        ('Final', 1),
+        ('Active', 1),
+        ('Total', 2),
+    ]
+    store_path = tmp_path / 'store.sqlite3'
+    with loaded_storage.PepStore(store_path) as other_run:
+        with requests_mock.Mocker() as mock:
+            register_pep_pages(mock)
+            assert main.pep(mock_session, incremental=store_path) == expected
+        assert other_run.get(PEP_INDEX_URL + 'pep-0001/') is None
+    with loaded_storage.PepStore(store_path) as store:
+        assert store.get(PEP_INDEX_URL + 'pep-0001/') is not None, (
+            'Записи должны сохраняться, пока хранилище открыто в другом '
+            'запуске'
+        )
+
+    locked_path = tmp_path / 'locked.sqlite3'
+    loaded_storage.PepStore(locked_path).close()
+    other = sqlite3.connect(str(locked_path), isolation_level=None)
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        with requests_mock.Mocker() as mock:
+            register_pep_pages(mock)
+            got = main.pep(mock_session, incremental=locked_path)
+    finally:
+        other.rollback()
+        other.close()
+    assert got == expected, (
+        'Занятое хранилище не должно исключать PEP из подсчёта'
+    )
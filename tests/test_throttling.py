@@ -0,0 +1,121 @@
+import io
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+try:
+    from src import throttling
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `throttling.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `throttling.py`'
+
+URL = 'https://peps.python.org/'
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.url = URL
+    response.raw = io.BytesIO(b'')
+    return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(throttling.time, 'sleep', delays.append)
+    return delays
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Подмена сетевого транспорта очередью ответов."""
+    responses = []
+
+    def send(adapter, request, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, 'send', send)
+    return responses
+
+
+def test_retry_after_seconds():
+    assert throttling.retry_after_seconds(
+        make_response(429, {'Retry-After': '7'})
+    ) == 7
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = throttling.retry_after_seconds(
+        make_response(503, {'Retry-After': format_datetime(retry_at)})
+    )
+    assert 25 < delay <= 30
+    assert throttling.retry_after_seconds(make_response(503)) is None
+
+
+def test_adapter_retries(server, sleeps):
+    server.extend([
+        make_response(503),
+        requests.ConnectionError('reset'),
+        make_response(429, {'Retry-After': '3'}),
+        make_response(200),
+    ])
+    session = requests.Session()
+    adapter = throttling.mount_throttled_adapter(session, retries=3)
+    response = session.get(URL)
+    assert response.status_code == 200
+    assert not server
+    assert len(sleeps) >= 3, 'Каждый повтор должен выполняться после паузы'
+    assert sleeps[2] == 3, 'Пауза должна соответствовать Retry-After'
+    assert adapter.host_throttle(URL).concurrency.limit == 2, (
+        'Перегрузка снижает предел до 1, успешный ответ увеличивает на 1'
+    )
+
+
+def test_adapter_gives_up(server, sleeps):
+    server.extend([make_response(503), make_response(503)])
+    session = requests.Session()
+    throttling.mount_throttled_adapter(session, retries=1)
+    assert session.get(URL).status_code == 503
+    assert not server
+
+
+def test_adapter_does_not_retry_post(server, sleeps):
+    server.extend([make_response(503)])
+    session = requests.Session()
+    throttling.mount_throttled_adapter(session, retries=3)
+    assert session.post(URL).status_code == 503
+    assert not sleeps
+
+
+def test_adaptive_concurrency():
+    concurrency = throttling.AdaptiveConcurrency(maximum=8)
+    assert concurrency.limit == 4
+    concurrency.acquire()
+    concurrency.release(overloaded=True)
+    assert concurrency.limit == 2, 'Перегрузка должна уменьшать предел вдвое'
+    for _ in range(50):
+        concurrency.acquire()
+        concurrency.release(latency=0.01)
+    assert concurrency.limit == 8, (
+        'Быстрые ответы должны увеличивать предел до максимума'
+    )
+    concurrency.acquire()
+    concurrency.release(latency=5)
+    assert concurrency.limit == 8, 'Медленный ответ не увеличивает предел'
+
+
+def test_token_bucket():
+    bucket = throttling.TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.05, (
+        'Запросы сверх ёмкости должны ждать пополнения'
+    )
@@ -1,10 +1,15 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 import requests
 import requests_mock
 import bs4
-from conftest import MAIN_DOC_URL
+from conftest import CORPUS_DIR, MAIN_DOC_URL
 try:
     from src import utils
+    from src.constants import PEP_INDEX_SCOPE, VERSIONS_SCOPE
 except ModuleNotFoundError:
     assert False, 'Убедитесь что в директории `src` есть файл `utils.py`'
 except ImportError:
@@ -54,3 +59,245 @@ def test_get_response(mock_session):
             'делает запрос к странице и возвращает ответ. \n'
             'Кстати: You are breathtaken!'
         )
+
+
+def test_map_concurrently_keeps_order():
+    futures = utils.map_concurrently(lambda x: x * 2, range(20), workers=4)
+    got = [future.result() for future in futures]
+    assert got == [x * 2 for x in range(20)], (
+        'Функция `map_concurrently` должна сохранять порядок элементов'
+    )
+
+
+def test_single_flight():
+    flight = utils.SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return 'page'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, 'url', fetch)
+        started.wait()
+        followers = [
+            executor.submit(flight.do, 'url', fetch) for _ in range(3)
+        ]
+        got = [leader.result()] + [future.result() for future in followers]
+    assert got == ['page'] * 4
+    assert len(calls) == 1, (
+        'Одинаковые одновременные запросы должны выполняться один раз'
+    )
+    assert flight.do('url', fetch) == 'page' and len(calls) == 2, (
+        'Завершённый запрос не должен переиспользоваться'
+    )
+
+
+PEP_PAGES = sorted(
+    (CORPUS_DIR / 'peps.python.org').glob('pep-*/index.html')
+)
+
+
+@pytest.mark.parametrize('page', PEP_PAGES, ids=lambda page: page.parent.name)
+def test_status_engines_parity(page):
+    html = page.read_text(encoding='utf-8')
+    expected = utils.extract_status_from_html(html, str(page))
+    got = utils.extract_status_with_lxml(html, str(page))
+    assert got == expected, (
+        'Движок `lxml` должен возвращать тот же статус, что и `bs4`'
+    )
+    body = page.read_bytes()
+    for extractor in utils.STATUS_EXTRACTORS.values():
+        assert extractor(body, str(page)) == expected, (
+            'Статус из тела страницы в байтах должен совпадать '
+            'со статусом из текста'
+        )
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'cp1251'])
+def test_parse_html_bytes(encoding):
+    html = (
+        f'<html><head><meta charset="{encoding}"></head><body>'
+        '<dl><dt>Status:</dt><dd>Принят</dd></dl></body></html>'
+    )
+    body = html.encode(encoding)
+    assert utils.declared_encoding(body) == encoding
+    assert utils.parse_html(body).dd.text == 'Принят', (
+        'Байты должны декодироваться в объявленной на странице кодировке'
+    )
+    assert utils.extract_status_with_lxml(body, 'page') == 'Принят'
+
+
+@pytest.mark.parametrize('scope', [None, PEP_INDEX_SCOPE])
+def test_extract_pep_index(scope):
+    html = (CORPUS_DIR / 'peps.python.org' / 'index.html').read_text(
+        encoding='utf-8'
+    )
+    warnings = []
+    soup = utils.parse_html(html, scope=scope)
+    entries = utils.extract_pep_index(soup, warnings)
+    numbers = [entry.number for entry in entries]
+    assert len(numbers) == len(set(numbers)) == 10, (
+        'PEP из нескольких таблиц должен попадать в индекс один раз'
+    )
+    assert not warnings
+    pep_1 = entries[numbers.index(1)]
+    assert pep_1.link == 'https://peps.python.org/pep-0001/'
+    assert pep_1.table_status == ('Active', 'Accepted')
+    assert pep_1.sections == [
+        'Meta-PEPs (PEPs about PEPs or Processes)', 'Numerical Index'
+    ]
+
+
+def test_parse_html_scope():
+    html = (CORPUS_DIR / 'docs.python.org' / '3' / 'index.html').read_text(
+        encoding='utf-8'
+    )
+    full = utils.parse_html(html)
+    scoped = utils.parse_html(html, scope=VERSIONS_SCOPE)
+    sidebar = {'class': 'sphinxsidebarwrapper'}
+    assert scoped.find('div', sidebar) == full.find('div', sidebar)
+    assert len(scoped.find_all(True)) < len(full.find_all(True)), (
+        'Разметка вне области разбора не должна попадать в дерево'
+    )
+
+
+def test_parse_row_status_letter():
+    soup = bs4.BeautifulSoup(
+        '<tr><td>SR</td><td><a href="pep-0003/">3</a></td></tr>'
+        '<tr><td>S</td><td><a href="pep-0004/">4</a></td></tr>',
+        'lxml',
+    )
+    rows = soup.find_all('tr')
+    assert utils.parse_row(rows[0], 1) == (
+        3, ('Rejected',), 'https://peps.python.org/pep-0003/'
+    ), 'Статус PEP задаётся второй буквой сокращения'
+    assert utils.parse_row(rows[1], 1)[1] == ('Draft', 'Active')
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_extract_concurrently_cache(corpus_session, extraction_cache,
+                                    processes):
+    from src import main
+    urls = [f'https://peps.python.org/pep-{n:04d}/' for n in (1, 8, 484)]
+    extractor = main.STATUS_EXTRACTORS['lxml']
+
+    def extract():
+        return [
+            future.result() for future in main.extract_concurrently(
+                corpus_session, urls, extractor, 2, processes
+            )
+        ]
+
+    first = extract()
+    assert first == ['Active', 'Active', 'Final']
+    assert not extraction_cache.used
+    assert extract() == first
+    assert len(extraction_cache.used) == len(urls), (
+        'Результаты разбора неизменённых страниц должны браться из кеша'
+    )
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_extract_concurrently_cache_by_url(mock_session, extraction_cache,
+                                           processes):
+    from src import main
+    html = (
+        '<h1>What’s New</h1>'
+        '<section id="summary"><h2>Summary</h2></section>'
+    )
+    urls = [
+        'https://docs.python.org/3/whatsnew/3.12.html',
+        'https://docs.python.org/3/whatsnew/3.13.html',
+    ]
+
+    def extract():
+        return [
+            future.result() for future in main.extract_concurrently(
+                mock_session, urls, main.extract_whats_new_sections,
+                2, processes,
+            )
+        ]
+
+    with requests_mock.Mocker() as mock:
+        for url in urls:
+            mock.get(url, text=html)
+        first = extract()
+        assert [sections[0][0] for sections in first] == [
+            url + '#summary' for url in urls
+        ], 'Страницы с одинаковым содержимым не должны делить результат'
+        assert extract() == first, (
+            'Результат из кеша должен совпадать с результатом парсера'
+        )
+    assert len(extraction_cache.used) == len(urls)
+
+
+def test_parser_context_is_not_fork():
+    assert utils._parser_context().get_start_method() != 'fork', (
+        'Процессы разбора не должны создаваться через fork '
+        'многопоточного процесса'
+    )
+
+
+def test_copy_future_result_save_error():
+    from concurrent.futures import Future
+
+    class BrokenCache:
+        def save(self, *args):
+            raise OSError('Нет места на диске')
+
+    source, target = Future(), Future()
+    source.set_result(['Final'])
+    utils._copy_future_result(target, BrokenCache(), ('v1', 'page'), source)
+    assert target.result(timeout=1) == ['Final'], (
+        'Ошибка сохранения в кеш не должна оставлять future незавершённым'
+    )
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'filesystem'])
+def test_trim_cache_without_loading(tmp_path, monkeypatch, backend):
+    from requests_cache import CachedSession
+    from conftest import mount_mock_adapter
+
+    session = mount_mock_adapter(
+        CachedSession(str(tmp_path / 'http_cache'), backend=backend)
+    )
+    for number in range(5):
+        session.get(f'mock://pages/{number}')
+    session.cache.delete(urls=['mock://pages/1'])
+    session.get('mock://pages/1')
+
+    def load(*args):
+        raise AssertionError('Ответы не должны загружаться из кеша')
+
+    monkeypatch.setattr(type(session.cache.responses), '__getitem__', load)
+    oldest = utils._oldest_cache_keys(session.cache, 3)
+    monkeypatch.undo()
+    assert len(oldest) == 3
+    assert utils.trim_cache(session.cache, 2) == 3
+    assert sorted(
+        response.url for response in session.cache.responses.values()
+    ) == ['mock://pages/1', 'mock://pages/4'], (
+        'Функция `trim_cache` должна удалять самые старые ответы'
+    )
+
+
+def test_status_with_lxml_without_header():
+    html = '<p>Intro</p><dt>Status</dt><dd> Draft </dd>'
+    assert utils.extract_status_with_lxml(html, 'pep') == 'Draft'
+    with pytest.raises(utils.ParserFindTagException):
+        utils.extract_status_with_lxml('<dl><dt>Type</dt></dl>', 'pep')
+
+
+def test_trim_cache(mock_session):
+    for number in range(5):
+        mock_session.get(f'mock://pages/{number}')
+    assert len(mock_session.cache.responses) == 5
+    assert utils.trim_cache(mock_session.cache, 2) == 3
+    assert len(mock_session.cache.responses) == 2
+    assert mock_session.cache.contains(url='mock://pages/4'), (
+        'Функция `trim_cache` должна удалять самые старые ответы'
+    )